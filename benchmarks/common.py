@@ -0,0 +1,13 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+from modules.walker import scan_files
+
+def collect_files(paths, limit, extensions=None):
+    """Returns up to limit files from the given files and folders (folders walked like the library)."""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        files.extend(entry.path for entry in scan_files(path, extensions=extensions))
+    return files[:limit]
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for the content hashes used by the cleaner.
+
+Usage:
+    python benchmarks/hash_throughput.py /Volumes/MusicUSB/Techno [more files/folders ...]
+
+Every file is read once before timing, so the numbers show hashing speed
+from the page cache (CPU bound), not the speed of the drive.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+from modules.hashing import available_algorithms, hash_file
+from common import collect_files
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash throughput benchmark (MB/s per algorithm)")
+    parser.add_argument("paths", nargs="+", help="Files or folders to hash")
+    parser.add_argument("--algorithms", nargs="+", default=available_algorithms(), choices=available_algorithms())
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per algorithm (best run is reported)")
+    parser.add_argument("--limit", type=int, default=500, help="Maximum number of files")
+    args = parser.parse_args()
+
+    console = Console()
+    files = collect_files(args.paths, args.limit)
+    total_bytes = sum(os.path.getsize(f) for f in files)
+    if not total_bytes:
+        console.print("[red]No data to hash.[/red]")
+        return
+
+    # Warm up the page cache
+    for f in files:
+        hash_file(f, available_algorithms()[0])
+
+    table = Table(title=f"{len(files)} files, {total_bytes / (1024 * 1024):.1f} MB")
+    table.add_column("Algorithm", style="cyan")
+    table.add_column("Best time (s)", style="magenta")
+    table.add_column("MB/s", style="green")
+
+    for algorithm in args.algorithms:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for f in files:
+                hash_file(f, algorithm)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        table.add_row(algorithm, f"{best:.3f}", f"{total_bytes / (1024 * 1024) / best:.1f}")
+
+    console.print(table)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Accuracy and throughput benchmark for the playlist matcher (MatchMaker).
+
+Usage:
+    python benchmarks/matcher_accuracy.py [--sizes 1000 10000 50000 200000] [--rows 500]
+
+For every library size a synthetic library of empty audio files is generated in a
+temporary folder, with names like real downloads ("01 - " prefixes, feat./&/, variants,
+mix names in brackets, underscores, accented artists). An Exportify-style CSV is
+generated next to it with ground truth: tracks that are in the library (named the
+Spotify way, "Title - Extended Mix" by "A, B") and tracks that are not, including
+other mixes of tracks that are. Reported per size:
+
+    precision  correct matches / all matches
+    recall     correct matches / rows that are in the library
+    rows/s     CSV rows matched per second (file list indexed beforehand, no result cache)
+    peak MB    peak Python memory of index + match (tracemalloc, separate run)
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+from modules.matcher import MatchMaker
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ten', 'vox', 'dee', 'zu', 'bel', 'nor', 'tra', 'sun', 'mo', 'lux',
+             'fer', 'ia', 'on', 'ex', 'ze', 'ri', 'dan', 'el', 'ko', 'sa', 'vi', 'ran', 'tu', 'ga', 'pho', 'lin',
+             'bo', 'qua', 'sil', 'ven', 'dra', 'mar', 'tes', 'ul', 'nix', 'ho']
+ACCENTS = {'a': 'áâå', 'e': 'éè', 'o': 'öø', 'u': 'üú', 'i': 'í'}
+WORDS = ['love', 'night', 'dream', 'fire', 'the', 'in', 'my', 'heart', 'city', 'lights', 'you', 'me', 'feel',
+         'deep', 'sunrise', 'echo', 'shadow', 'gravity', 'ocean', 'rhythm', 'lost', 'home', 'forever', 'space']
+MIXES = ['Original Mix', 'Extended Mix', 'Radio Edit', 'Dub Mix', 'Club Mix', 'Instrumental', 'VIP Mix']
+EXTENSIONS = ['.mp3', '.mp3', '.flac', '.wav', '.aiff', '.m4a']
+
+def make_word(rng, syllables):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+def make_artist(rng):
+    name = ' '.join(make_word(rng, rng.randint(2, 3)).capitalize() for _ in range(rng.choice([1, 1, 2])))
+    if rng.random() < 0.15:
+        # Unicode artist names (Röyksopp, Âme, ...)
+        name = ''.join(rng.choice(ACCENTS[c]) if c in ACCENTS and rng.random() < 0.3 else c for c in name)
+    return name
+
+def make_title(rng):
+    words = [rng.choice(WORDS) if rng.random() < 0.5 else make_word(rng, rng.randint(2, 3)) for _ in range(rng.randint(1, 4))]
+    return ' '.join(words).title()
+
+def library_filename(rng, track):
+    """A filename the way downloads/rips tend to look."""
+    artists, title, mix = track
+    style = rng.random()
+    if len(artists) > 1:
+        artist_str = rng.choice([f"{artists[0]} feat. {artists[1]}", f"{artists[0]} ft. {artists[1]}",
+                                 f"{artists[0]} & {artists[1]}", ", ".join(artists)])
+    else:
+        artist_str = artists[0]
+    mix_str = f" ({mix})" if mix and (mix != 'Original Mix' or rng.random() < 0.5) else ""
+    name = f"{artist_str} - {title}{mix_str}"
+    if style < 0.25:
+        name = f"{rng.randint(1, 20):02d} - {name}"
+    elif style < 0.35:
+        name = name.replace(' ', '_')
+    elif style < 0.45:
+        name = name.lower()
+    return name + rng.choice(EXTENSIONS)
+
+def csv_row(track):
+    """Exportify style: "Title - Mix" and comma separated artists."""
+    artists, title, mix = track
+    track_name = f"{title} - {mix}" if mix else title
+    return track_name, ", ".join(artists)
+
+def generate(root, n_files, n_rows, seed):
+    """Creates the library under root. Returns CSV rows as (track name, artists, expected path or None)."""
+    rng = random.Random(seed)
+    artists = [make_artist(rng) for _ in range(max(10, n_files // 6))]
+    tracks = {}  # (artists, title, mix) -> path
+    used_names = set()
+    while len(tracks) < n_files:
+        main = rng.choice(artists)
+        track_artists = (main, rng.choice(artists)) if rng.random() < 0.2 else (main,)
+        track = (track_artists, make_title(rng), rng.choice(MIXES) if rng.random() < 0.8 else None)
+        if track in tracks:
+            continue
+        name = library_filename(rng, track)
+        if name.lower() in used_names:
+            continue
+        used_names.add(name.lower())
+        folder = os.path.join(root, main[0].upper(), main)
+        tracks[track] = os.path.join(folder, name)
+
+    for path in tracks.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+
+    rows = []
+    present = rng.sample(list(tracks), min(n_rows * 3 // 4, len(tracks)))
+    for track in present:
+        rows.append((*csv_row(track), tracks[track]))
+    while len(rows) < n_rows:
+        if rng.random() < 0.4:
+            # Another mix of a track that is in the library: must not match
+            artists_, title, mix = rng.choice(present)
+            track = (artists_, title, rng.choice([m for m in MIXES if m != mix]))
+        else:
+            track = ((rng.choice(artists),), make_title(rng), rng.choice(MIXES))
+        if track in tracks:
+            continue
+        rows.append((*csv_row(track), None))
+    rng.shuffle(rows)
+    return rows
+
+def write_csv(csv_path, rows):
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["Track URI", "Track Name", "Artist Name(s)", "Album Name", "ISRC"])
+        for i, (track_name, artist, _) in enumerate(rows):
+            writer.writerow([f"spotify:track:{i:022d}", track_name, artist, "", ""])
+
+def run_match(library, csv_path, threshold, key_mode):
+    matcher = MatchMaker(key_mode=key_mode)
+    shutil.rmtree(os.path.join(library, MatchMaker.RESULT_CACHE_DIR), ignore_errors=True)
+    start = time.perf_counter()
+    matcher._index_files(library)
+    index_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = matcher.match(csv_path, library, threshold)
+    return result, index_time, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="MatchMaker precision/recall and throughput benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 50000, 200000], help="Library sizes (files)")
+    parser.add_argument("--rows", type=int, default=500, help="CSV rows per run")
+    parser.add_argument("--threshold", type=int, default=85)
+    parser.add_argument("--match-keys", choices=MatchMaker.KEY_MODES, default="filename")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slower) tracemalloc run")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated libraries")
+    args = parser.parse_args()
+
+    console = Console()
+    table = Table(title=f"MatchMaker, threshold {args.threshold}, keys: {args.match_keys}")
+    for column in ("Files", "Rows", "Index (s)", "Match (s)", "Rows/s", "Precision", "Recall", "Peak MB"):
+        table.add_column(column, justify="right")
+
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f"dj_matcher_{size}_")
+        try:
+            library = os.path.join(workdir, "library")
+            csv_path = os.path.join(workdir, "playlist.csv")
+            console.print(f"[dim]Generating {size} files in {workdir}...[/dim]")
+            rows = generate(library, size, args.rows, args.seed)
+            write_csv(csv_path, rows)
+
+            result, index_time, match_time = run_match(library, csv_path, args.threshold, args.match_keys)
+            correct = wrong = 0
+            for (_, _, expected), row in zip(rows, result['rows']):
+                if row['found']:
+                    if row['path'] == expected:
+                        correct += 1
+                    else:
+                        wrong += 1
+            expected_found = sum(1 for _, _, expected in rows if expected)
+            precision = correct / (correct + wrong) if correct + wrong else 0.0
+            recall = correct / expected_found if expected_found else 0.0
+
+            peak = "-"
+            if not args.no_memory:
+                tracemalloc.start()
+                run_match(library, csv_path, args.threshold, args.match_keys)
+                peak = f"{tracemalloc.get_traced_memory()[1] / (1024 * 1024):.1f}"
+                tracemalloc.stop()
+
+            table.add_row(str(size), str(len(rows)), f"{index_time:.2f}", f"{match_time:.2f}",
+                          f"{len(rows) / match_time:.0f}", f"{precision:.3f}", f"{recall:.3f}", peak)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    console.print(table)
+
+if __name__ == "__main__":
+    main()
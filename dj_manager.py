@@ -9,12 +9,15 @@ import questionary
 
 # Import modules
 from modules.cleaner import CleanModule
-from modules.doctor import HealthGuard
+from modules.doctor import HealthGuard, DECODERS, HEALTH_EXTENSIONS
 from modules.matcher import MatchMaker
 from modules.renamer import RenamerModule
 from modules.scraper import BeatportScraper
 from modules.analyzer import QualityAnalyzer
 from modules.tagger import OneTaggerModule
+from modules.hashing import DEFAULT_ALGORITHM, available_algorithms
+from modules.fileops import FileOperationExecutor
+from modules.libraryindex import LibraryIndex
 
 console = Console()
 
@@ -65,24 +68,30 @@ def _save_last_root(path):
     except:
         pass
 
-def run_cleaner(root_path, dry_run=False):
+def run_cleaner(root_path, dry_run=False, workers=1, use_processes=False, algorithm=DEFAULT_ALGORITHM):
     console.print("[bold blue]== Module A: Interactive Cleaner ==[/bold blue]")
     
     mode = questionary.select(
         "Scan Mode:",
         choices=[
             "1. Deep Scan (Hash Content) - Slow, exact",
-            "2. Quick Scan (Filename only) - Fast, ignores '01 - ' prefixes"
+            "2. Quick Scan (Filename only) - Fast, ignores '01 - ' prefixes",
+            "3. Audio Scan (Hash audio data only) - Finds copies with different tags",
+            "4. Acoustic Scan (Fingerprint) - Slowest, finds same recording in other formats (MP3 vs FLAC)"
         ]
     ).ask()
     
     if mode is None:
         return
     
-    cleaner = CleanModule(dry_run=dry_run)
+    cleaner = CleanModule(dry_run=dry_run, workers=workers, use_processes=use_processes, algorithm=algorithm)
     
     if mode.startswith("1."):
         cleaner.scan(root_path)
+    elif mode.startswith("3."):
+        cleaner.scan(root_path, audio_only=True)
+    elif mode.startswith("4."):
+        cleaner.fingerprint_scan(root_path)
     else:
         cleaner.quick_scan(root_path)
         
@@ -91,20 +100,28 @@ def run_cleaner(root_path, dry_run=False):
     console.print(f"\n[green]Files scanned:[/green] {report['total_files']}")
     console.print(f"[red]Duplicates found:[/red] {report['duplicates']}")
     console.print(f"[yellow]Potential space savings:[/yellow] {report['wasted_size_mb']:.2f} MB")
+    if report['already_linked']:
+        console.print(f"[dim]Already hardlinked (no extra space): {report['already_linked']}[/dim]")
+    if mode.startswith(("1.", "3.")):
+        console.print(f"[dim]Not read (unique size): {report['skipped_by_size_mb']:.2f} MB, "
+                      f"not read (head/tail differ): {report['skipped_by_partial_mb']:.2f} MB[/dim]")
     
     if report['duplicates'] == 0:
         console.print("No duplicates found. Heading back.")
         return
 
-    action = questionary.select(
-        "How do you want to handle duplicates?",
-        choices=[
-            "a) Delete (Keep oldest file, delete newer duplicates)",
-            "b) Move to /_DUPLICATES_TRASH",
-            "c) Just show report",
-            "d) Cancel"
-        ]
-    ).ask()
+    choices = [
+        "a) Delete (Keep best quality file, delete other encodings)" if mode.startswith("4.")
+        else "a) Delete (Keep oldest file, delete newer duplicates)",
+        "b) Move to /_DUPLICATES_TRASH",
+        "c) Just show report",
+        "d) Cancel"
+    ]
+    if cleaner.linkable:
+        # Only for byte-identical duplicates: paths stay valid (e.g. for Rekordbox playlists)
+        choices.insert(2, "l) Replace with links to the oldest file (Keeps all paths valid)")
+    
+    action = questionary.select("How do you want to handle duplicates?", choices=choices).ask()
     
     if action.startswith("a)"):
         confirm = Confirm.ask("Are you SURE you want to DELETE files?", default=False)
@@ -116,29 +133,60 @@ def run_cleaner(root_path, dry_run=False):
         results = cleaner.deduplicate('move', root_path)
         for res in results:
             console.print(res)
+    elif action.startswith("l)"):
+        results = cleaner.deduplicate('link', root_path)
+        for res in results:
+            console.print(res)
     elif action.startswith("c)"):
         # Just show the list?
         # For brevity, let's just say "Done"
         # Ideally we list them.
         pass
 
-def run_doctor(root_path, dry_run=False):
+def run_doctor(root_path, dry_run=False, workers=None, decoder='builtin', max_age_days=None):
     console.print("[bold blue]== Module B: Health Guard ==[/bold blue]")
-    doctor = HealthGuard(dry_run=dry_run)
-    corrupt_files = doctor.scan_flac(root_path)
+    formats = questionary.select(
+        "Formats:",
+        choices=[
+            "1. All audio files (FLAC, MP3, M4A, WAV, AIFF)",
+            "2. FLAC only"
+        ]
+    ).ask()
+    mode = questionary.select(
+        "FLAC Check Mode:",
+        choices=[
+            "1. Quick Check (File structure, decodes only suspicious files + a random sample) - Fast",
+            "2. Full Check (Decode every file, MD5 check) - Slow, exact"
+        ]
+    ).ask()
+
+    if formats is None or mode is None:
+        return
+    extensions = HEALTH_EXTENSIONS if formats.startswith("1.") else ('.flac',)
+
+    doctor = HealthGuard(dry_run=dry_run, workers=workers, decoder=decoder, max_age_days=max_age_days)
+    if mode.startswith("1."):
+        percent = Prompt.ask("Also fully decode a random sample of the other files (%)", default="2")
+        try:
+            decode_sample = min(max(float(percent), 0.0), 100.0) / 100
+        except ValueError:
+            decode_sample = 0.0
+        corrupt_files = doctor.scan(root_path, quick=True, decode_sample=decode_sample, extensions=extensions)
+    else:
+        corrupt_files = doctor.scan(root_path, extensions=extensions)
+    if doctor.skipped:
+        console.print(f"[dim]Skipped {doctor.skipped} unchanged files that passed before.[/dim]")
+
+    # Always save report (from the verdict store, so it covers the whole library)
+    doctor.export_report(root_path, "corrupt_files_report.csv")
     
     if not corrupt_files:
-        console.print("[green]No corrupt FLAC files found![/green]")
+        console.print("[green]No corrupt files found![/green]")
         return
         
     console.print(f"[red]Found {len(corrupt_files)} corrupt files.[/red]")
     for f in corrupt_files:
-        console.print(f" - {f}")
-
-    # Always save report
-    with open("corrupt_files_report.csv", "w") as f:
-        f.write("Filename\n")
-        f.write("\n".join(corrupt_files))
+        console.print(f" - {f} [dim]({doctor.tiers[f]} check)[/dim]")
     console.print("[dim]Report saved to corrupt_files_report.csv[/dim]")
 
     action = questionary.select(
@@ -154,7 +202,27 @@ def run_doctor(root_path, dry_run=False):
         for res in results:
             console.print(res)
 
-def run_matcher(root_path, dry_run=False, csv_path=None):
+def _print_tier_hits(tier_hits):
+    console.print(f"[dim]Matched by ISRC: {tier_hits['isrc']} | exact name: {tier_hits['exact']} | fuzzy: {tier_hits['fuzzy']}[/dim]")
+
+def _default_playlist_name(csv_path):
+    # Default name based on CSV filename
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    
+    # Determine prefix
+    prefix = "[Spotify]"
+    if "beatport" in base.lower() or "chart" in base.lower():
+        prefix = "[Beatport]"
+        # Remove 'beatport' from base name to avoid particular "[Beatport] Beatport ..."
+        import re
+        base = re.sub(r'beatport', '', base, flags=re.IGNORECASE).strip()
+        base = re.sub(r'\s+', ' ', base).strip() # clean double spaces
+    
+    # specific format: [Prefix] Title Cased With Spaces
+    formatted_name = base.replace("_", " ").title()
+    return f"{prefix} {formatted_name}.m3u8"
+
+def run_matcher(root_path, dry_run=False, csv_path=None, matcher_options=None, matcher=None):
     console.print("[bold blue]== Module C: Matchmaker ==[/bold blue]")
     
     if not csv_path:
@@ -166,7 +234,8 @@ def run_matcher(root_path, dry_run=False, csv_path=None):
         console.print("[red]File not found![/red]")
         return
         
-    matcher = MatchMaker(dry_run=dry_run)
+    # A matcher passed in keeps its index and results between steps (guided workflow)
+    matcher = matcher or MatchMaker(dry_run=dry_run, **(matcher_options or {}))
     res = matcher.match(csv_path, root_path)
     
     if "error" in res:
@@ -179,35 +248,23 @@ def run_matcher(root_path, dry_run=False, csv_path=None):
     
     console.print(f"[green]Found:[/green] {found}")
     console.print(f"[red]Missing:[/red] {missing}")
+    _print_tier_hits(params['tier_hits'])
     
     if missing > 0:
         base_name = os.path.splitext(os.path.basename(csv_path))[0]
         output_dir = os.path.dirname(os.path.abspath(csv_path))
         missing_path = os.path.join(output_dir, f"{base_name}_missing.txt")
         
-        with open(missing_path, "w") as f:
-             f.write("\n".join(params['missing_tracks']))
-        console.print(f"Missing tracks saved to: {missing_path}")
+        console.print(matcher.export_missing(params['missing_tracks'], missing_path))
+        
+        # Same match result, so the deduped CSV costs nothing extra
+        deduped = matcher.export_deduped_csv(params)
+        if deduped.get('path'):
+            console.print(f"Deduped CSV saved to: {deduped['path']}")
         
     if found > 0:
         if Confirm.ask("Save M3U8 playlist?"):
-            # Default name based on CSV filename
-            base = os.path.splitext(os.path.basename(csv_path))[0]
-            
-            # Determine prefix
-            prefix = "[Spotify]"
-            if "beatport" in base.lower() or "chart" in base.lower():
-                prefix = "[Beatport]"
-                # Remove 'beatport' from base name to avoid particular "[Beatport] Beatport ..."
-                import re
-                base = re.sub(r'beatport', '', base, flags=re.IGNORECASE).strip()
-                base = re.sub(r'\s+', ' ', base).strip() # clean double spaces
-            
-            # specific format: [Prefix] Title Cased With Spaces
-            formatted_name = base.replace("_", " ").title()
-            default_name = f"{prefix} {formatted_name}.m3u8"
-            
-            name = Prompt.ask("Playlist Name", default=default_name)
+            name = Prompt.ask("Playlist Name", default=_default_playlist_name(csv_path))
             
             # Auto-append extension
             if not name.lower().endswith(('.m3u8', '.m3u')):
@@ -220,6 +277,76 @@ def run_matcher(root_path, dry_run=False, csv_path=None):
             msg = matcher.export_m3u(params['found_tracks'], output_path)
             console.print(msg)
 
+def _expand_csv_paths(pattern):
+    """CSV files of a folder or a glob pattern (our own _deduped.csv outputs excluded)."""
+    import glob
+    pattern = os.path.expanduser(pattern)
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.csv")
+    return sorted(p for p in glob.glob(pattern) if p.lower().endswith('.csv') and not p.endswith('_deduped.csv'))
+
+def run_batch_sync(root_path, dry_run=False, matcher_options=None):
+    console.print("[bold blue]== Batch Playlist Sync ==[/bold blue]")
+    pattern = Prompt.ask("Folder or glob of CSVs", default=os.path.expanduser("~/Downloads/*.csv")).strip().strip("'").strip('"')
+    csv_paths = _expand_csv_paths(pattern)
+    if not csv_paths:
+        console.print("[red]No CSV files found![/red]")
+        return
+    console.print(f"Syncing {len(csv_paths)} playlists...")
+    
+    # One library index for all playlists, matched concurrently
+    matcher = MatchMaker(dry_run=dry_run, **(matcher_options or {}))
+    results = matcher.match_playlists(csv_paths, root_path)
+    
+    from rich.table import Table
+    table = Table(title="Batch Playlist Sync")
+    table.add_column("Playlist", style="cyan")
+    table.add_column("Found", style="green")
+    table.add_column("Missing", style="red")
+    table.add_column("M3U8", style="magenta")
+    
+    # Existing playlists are only rewritten if their tracks changed, and only after asking
+    m3u_paths, statuses = {}, {}
+    for csv_path, res in zip(csv_paths, results):
+        if "error" not in res and res['found_tracks']:
+            output_dir = os.path.dirname(os.path.abspath(csv_path))
+            m3u_paths[csv_path] = os.path.join(output_dir, _default_playlist_name(csv_path))
+            statuses[csv_path] = matcher.m3u_status(res['found_tracks'], m3u_paths[csv_path])
+    changed = [m3u_paths[p] for p in csv_paths if statuses.get(p) == 'changed']
+    replace = False
+    if changed:
+        prefix = "[DRY-RUN] Would replace" if dry_run else "Replacing"
+        console.print(f"[yellow]{prefix} {len(changed)} existing playlists whose tracks changed:[/yellow]")
+        for path in changed:
+            console.print(f" [dim]{os.path.basename(path)}[/dim]")
+        replace = dry_run or Confirm.ask("Replace these M3U8 files?", default=True)
+    
+    for csv_path, res in zip(csv_paths, results):
+        if "error" in res:
+            table.add_row(os.path.basename(csv_path), "-", "-", f"[red]{res['error']}[/red]")
+            continue
+        output_dir = os.path.dirname(os.path.abspath(csv_path))
+        base_name = os.path.splitext(os.path.basename(csv_path))[0]
+        if res['missing_tracks']:
+            matcher.export_missing(res['missing_tracks'], os.path.join(output_dir, f"{base_name}_missing.txt"))
+        m3u_name = "-"
+        if csv_path in m3u_paths:
+            m3u_name = os.path.basename(m3u_paths[csv_path])
+            status = statuses[csv_path]
+            if status == 'new' or (status == 'changed' and replace):
+                matcher.export_m3u(res['found_tracks'], m3u_paths[csv_path])
+                verb = "created" if status == 'new' else "replaced"
+                m3u_name += f" (would be {verb})" if dry_run else f" ({verb})"
+            elif status == 'changed':
+                m3u_name += " (kept old)"
+            else:
+                m3u_name += " (unchanged)"
+        table.add_row(os.path.basename(csv_path), str(len(res['found_tracks'])), str(len(res['missing_tracks'])), m3u_name)
+    
+    console.print(table)
+    if dry_run:
+        console.print("[magenta][DRY-RUN] No M3U8 files were written.[/magenta]")
+
 def run_renamer(root_path, dry_run=False):
     console.print("[bold blue]== Module D: Prefix Remover ==[/bold blue]")
     renamer = RenamerModule(dry_run=dry_run)
@@ -238,7 +365,7 @@ def run_renamer(root_path, dry_run=False):
         console.print(f" ... and {len(mapping)-5} more.")
         
     if Confirm.ask("Proceed with renaming?"):
-        results = renamer.execute()
+        results = renamer.execute(root_path)
         for res in results:
             console.print(res)
 
@@ -262,7 +389,7 @@ def _select_csv():
         return Prompt.ask("Path to Exportify CSV").strip().strip("'").strip('"')
     return selection
 
-def run_deduplicator(root_path, dry_run=False, csv_path=None):
+def run_deduplicator(root_path, dry_run=False, csv_path=None, matcher_options=None, matcher=None):
     console.print("[bold blue]== Module E: CSV Deduplicator ==[/bold blue]")
     
     if not csv_path:
@@ -271,7 +398,7 @@ def run_deduplicator(root_path, dry_run=False, csv_path=None):
     if not csv_path: 
         return
 
-    matcher = MatchMaker(dry_run=dry_run)
+    matcher = matcher or MatchMaker(dry_run=dry_run, **(matcher_options or {}))
     # The message includes the path, so we don't need to print it again unless we want to be explicit
     result = matcher.deduplicate_csv(csv_path, root_path)
     
@@ -279,10 +406,11 @@ def run_deduplicator(root_path, dry_run=False, csv_path=None):
         console.print(f"[bold red]Error:[/bold red] {result['error']}")
     else:
         console.print(f"[green]{result['message']}[/green]")
+        _print_tier_hits(result['tier_hits'])
         if result['path']:
              console.print(f"Saved to: [bold]{result['path']}[/bold]")
 
-def run_import_deduplicator(root_path, dry_run=False):
+def run_import_deduplicator(root_path, dry_run=False, workers=1, use_processes=False, algorithm=DEFAULT_ALGORITHM):
     console.print("[bold blue]== Module F: Import Deduplicator (Folder Stager) ==[/bold blue]")
     console.print(f"Main Library: [yellow]{root_path}[/yellow]")
     
@@ -291,7 +419,7 @@ def run_import_deduplicator(root_path, dry_run=False):
          console.print("[red]Source path not found![/red]")
          return
 
-    cleaner = CleanModule(dry_run=dry_run)
+    cleaner = CleanModule(dry_run=dry_run, workers=workers, use_processes=use_processes, algorithm=algorithm)
     
     # 0. Optional: Run Prefix Remover on Source
     if Confirm.ask("Run Prefix Remover on Source Folder first? (Removes '01 - ')", default=False):
@@ -300,7 +428,7 @@ def run_import_deduplicator(root_path, dry_run=False):
         if mapping:
             console.print(f"[yellow]Found {len(mapping)} files to rename in Source.[/yellow]")
             if Confirm.ask("Proceed with renaming in Source?"):
-                res = renamer.execute()
+                res = renamer.execute(root_path)
                 for r in res: console.print(r)
         else:
             console.print("[dim]No files to rename found.[/dim]")
@@ -310,11 +438,12 @@ def run_import_deduplicator(root_path, dry_run=False):
         "Comparison Method:",
         choices=[
             "1. Deep Hash (Exact Content Match)",
-            "2. Filename (Match 'Song.mp3' to '01 - Song.mp3')"
+            "2. Filename (Match 'Song.mp3' to '01 - Song.mp3')",
+            "3. Audio Hash (Exact audio match, ignores tags)"
         ]
     ).ask()
     
-    comparison = 'hash' if comp_choice.startswith('1') else 'filename'
+    comparison = {'1': 'hash', '2': 'filename', '3': 'audio'}[comp_choice[0]]
     
     # 2. Run Scan
     duplicates = cleaner.scan_import(source_path, root_path, comparison=comparison)
@@ -365,7 +494,7 @@ def run_import_deduplicator(root_path, dry_run=False):
         return
 
     # 4. Resolve
-    results = cleaner.resolve_import_duplicates(duplicates, source_path, mode=scan_mode)
+    results = cleaner.resolve_import_duplicates(duplicates, source_path, mode=scan_mode, library_path=root_path)
     
     for res in results:
         console.print(res)
@@ -490,7 +619,7 @@ def run_tagger_flow(root_path, dry_run=False):
                  console.print(f" [dim]{os.path.basename(old)}[/dim] -> [cyan]{os.path.basename(new)}[/cyan]")
                  
             if Confirm.ask("Proceed with renaming?"):
-                renamer.execute()
+                renamer.execute(root_path)
                 console.print("[green]Renaming complete.[/green]")
         else:
             console.print("[dim]No files needed renaming.[/dim]")
@@ -503,7 +632,61 @@ def run_tagger_flow(root_path, dry_run=False):
         
         tagger.run_tagger(target_path)
 
-def run_guided_workflow(root_path, dry_run=False):
+def run_journal(root_path, dry_run=False):
+    console.print("[bold blue]== Undo / Resume File Operations ==[/bold blue]")
+    executor = FileOperationExecutor(root_path)
+    journals = executor.list_journals()
+    
+    if not journals:
+        console.print("[dim]No recorded file operations.[/dim]")
+        return
+        
+    choices = [
+        f"{j['created']}  {j['label']}  ({j['done']}/{j['total']} done, {j['pending']} pending, {j['undone']} undone)"
+        for j in journals[:15]
+    ]
+    selection = questionary.select("Select batch:", choices=choices + ["Cancel"]).ask()
+    if not selection or selection == "Cancel":
+        return
+    journal = journals[choices.index(selection)]
+    
+    action = questionary.select(
+        "Action:",
+        choices=[
+            "a) Undo (move files back, turn links into copies)",
+            "b) Resume (run pending/failed operations)",
+            "c) Cancel"
+        ]
+    ).ask()
+    
+    if not action or action.startswith("c)"):
+        return
+    if dry_run:
+        console.print("[magenta][DRY-RUN] No files touched.[/magenta]")
+        return
+        
+    if action.startswith("a)"):
+        results = executor.undo(journal['path'])
+    else:
+        results = executor.resume(journal['path'])
+        
+    for op, error in results:
+        if error:
+            console.print(f"[red][ERROR][/red] {op['src']}: {error}")
+        else:
+            console.print(f"{op['type'].capitalize()}: {op['src']}" + (f" -> {op['dst']}" if op.get('dst') else ""))
+    console.print(f"[green]{sum(1 for _, e in results if not e)} of {len(results)} operations completed.[/green]")
+
+def run_rebuild_index(root_path):
+    console.print("[bold blue]== Rebuild Library Index ==[/bold blue]")
+    console.print("[dim]Playlist Sync and CSV Deduplicator normally only re-list folders that changed.[/dim]")
+    index = LibraryIndex(root_path)
+    with console.status("Listing all library folders..."):
+        files = index.refresh(rebuild=True)
+    console.print(f"[green]Indexed {len(files)} audio files in {index.listed} folders.[/green]")
+
+def run_guided_workflow(root_path, dry_run=False, workers=1, use_processes=False, algorithm=DEFAULT_ALGORITHM,
+                        matcher_options=None):
     console.print("[bold blue]== Module I: Guided Import Workflow ==[/bold blue]")
     
     # 1. Select Source
@@ -521,6 +704,10 @@ def run_guided_workflow(root_path, dry_run=False):
 
     csv_path = None
     
+    # One matcher for all steps: the library index is only refreshed, and a CSV matched
+    # against an unchanged library is not matched again
+    matcher = MatchMaker(dry_run=dry_run, **(matcher_options or {}))
+    
     if source.startswith("2."):
         # Beatport Flow: Scrape first
         console.print("\n[bold]Step 1: Scrape Metadata[/bold]")
@@ -547,7 +734,7 @@ def run_guided_workflow(root_path, dry_run=False):
             csv_path = _select_csv()
             
     if csv_path:
-        run_deduplicator(root_path, dry_run, csv_path=csv_path)
+        run_deduplicator(root_path, dry_run, csv_path=csv_path, matcher=matcher)
         
         # User now has a "Clean" CSV (e.g., 'Playlist_missing.txt' or modified ID).
         # Actually run_deduplicator saves a new CSV usually.
@@ -567,12 +754,12 @@ def run_guided_workflow(root_path, dry_run=False):
     # 5. Verify Import (Deduplicate Import)
     console.print("\n[bold]Step 5: Verify Import (Double Checks)[/bold]")
     if Confirm.ask("Check for accidentally downloaded duplicates (Hash check)?", default=True):
-        run_import_deduplicator(root_path, dry_run)
+        run_import_deduplicator(root_path, dry_run, workers, use_processes, algorithm)
 
     # 6. Create M3U8
     console.print("\n[bold]Step 6: Sync Playlist (Create M3U8)[/bold]")
     if Confirm.ask("Create M3U8 playlist from original CSV?", default=True):
-         run_matcher(root_path, dry_run, csv_path=csv_path)
+         run_matcher(root_path, dry_run, csv_path=csv_path, matcher=matcher)
         
     console.print("\n[bold green]Workflow Complete![/bold green]")
     console.print("Don't forget to move your tagged files to your main library if you haven't yet.")
@@ -583,7 +770,25 @@ def main():
     parser = argparse.ArgumentParser(description="DJ Library Manager")
     parser.add_argument("--root", help="Root directory of music library")
     parser.add_argument("--dry-run", action="store_true", help="Simulate actions without deleting/moving")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel hashing workers (use >1 for SSD/NVMe libraries)")
+    parser.add_argument("--processes", action="store_true", help="Hash in worker processes instead of threads")
+    parser.add_argument("--hash-algo", choices=available_algorithms(), default=DEFAULT_ALGORITHM,
+                        help="Content hash for duplicate detection")
+    parser.add_argument("--check-workers", type=int, default=None,
+                        help="Files of any format checked at once in the Health Check (default: number of CPU cores)")
+    parser.add_argument("--flac-decoder", choices=DECODERS, default="builtin",
+                        help="Health Check decoder: built-in (MD5 check, no external tools) or 'flac -t' per file")
+    parser.add_argument("--reverify-days", type=float, default=None, metavar="DAYS",
+                        help="Health Check: also check files again that passed more than DAYS ago (bit rot sweep)")
+    parser.add_argument("--exhaustive-match", action="store_true",
+                        help="Compare every CSV row against every library file (slow; can match more rows, mostly through common words)")
+    parser.add_argument("--match-keys", choices=MatchMaker.KEY_MODES, default="filename",
+                        help="Match playlists against filenames, artist/title tags, or both")
+    parser.add_argument("--duration-tolerance", type=float, default=None, metavar="SECONDS",
+                        help="Only match files whose length is within SECONDS of the CSV duration (e.g. 5)")
     args = parser.parse_args()
+    matcher_options = {'exhaustive': args.exhaustive_match, 'key_mode': args.match_keys,
+                       'duration_tolerance': args.duration_tolerance}
     
     root_path = get_root_path(args)
     if not os.path.exists(root_path):
@@ -599,7 +804,7 @@ def main():
             "Main Menu",
             choices=[
                 "1) Scan & Deduplicate",
-                "2) Health Check (FLAC)",
+                "2) Health Check (FLAC, MP3, M4A, WAV, AIFF)",
                 "3) Playlist Sync (CSV to M3U)",
                 "4) Prefix Remover (01 - Song.mp3 -> Song.mp3)",
                 "5) CSV Deduplicator (Remove owned tracks from CSV)",
@@ -608,22 +813,25 @@ def main():
                 "8) Analyze Audio Quality (Bitrate/Format Report)",
                 "9) OneTagger Auto-Tagging (Clean & Tag)",
                 "10) Guided Import Workflow (Spotify/Beatport)",
+                "11) Undo / Resume File Operations",
+                "12) Rebuild Library Index (Playlist Sync)",
+                "13) Batch Playlist Sync (Folder of CSVs)",
                 "q) Quit"
             ]
         ).ask()
         
         if choice.startswith("1)"):
-            run_cleaner(root_path, args.dry_run)
+            run_cleaner(root_path, args.dry_run, args.workers, args.processes, args.hash_algo)
         elif choice.startswith("2)"):
-            run_doctor(root_path, args.dry_run)
+            run_doctor(root_path, args.dry_run, args.check_workers, args.flac_decoder, args.reverify_days)
         elif choice.startswith("3)"):
-            run_matcher(root_path, args.dry_run)
+            run_matcher(root_path, args.dry_run, matcher_options=matcher_options)
         elif choice.startswith("4)"):
             run_renamer(root_path, args.dry_run)
         elif choice.startswith("5)"):
-            run_deduplicator(root_path, args.dry_run)
+            run_deduplicator(root_path, args.dry_run, matcher_options=matcher_options)
         elif choice.startswith("6)"):
-            run_import_deduplicator(root_path, args.dry_run)
+            run_import_deduplicator(root_path, args.dry_run, args.workers, args.processes, args.hash_algo)
         elif choice.startswith("7)"):
             run_scraper(root_path)
         elif choice.startswith("8)"):
@@ -631,7 +839,14 @@ def main():
         elif choice.startswith("9)"):
             run_tagger_flow(root_path, args.dry_run)
         elif choice.startswith("10)"):
-            run_guided_workflow(root_path, args.dry_run)
+            run_guided_workflow(root_path, args.dry_run, args.workers, args.processes, args.hash_algo,
+                                matcher_options)
+        elif choice.startswith("11)"):
+            run_journal(root_path, args.dry_run)
+        elif choice.startswith("12)"):
+            run_rebuild_index(root_path)
+        elif choice.startswith("13)"):
+            run_batch_sync(root_path, args.dry_run, matcher_options)
         elif choice.startswith("q)"):
             console.print("Bye!")
             sys.exit(0)
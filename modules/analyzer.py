@@ -2,6 +2,7 @@ import os
 import csv
 from rich.console import Console
 from rich.progress import track
+from modules.walker import scan_files, AUDIO_EXTENSIONS
 
 class QualityAnalyzer:
     def __init__(self, dry_run=False):
@@ -24,14 +25,9 @@ class QualityAnalyzer:
             return {}
 
         results = []
-        audio_exts = ('.mp3', '.flac', '.m4a', '.wav', '.aiff')
         
-        # Count total files for progress bar
-        file_paths = []
-        for root, _, files in os.walk(root_path):
-            for file in files:
-                if file.lower().endswith(audio_exts):
-                    file_paths.append(os.path.join(root, file))
+        # Collect files first for progress bar
+        file_paths = [entry.path for entry in scan_files(root_path, extensions=AUDIO_EXTENSIONS)]
 
         for file_path in track(file_paths, description="Analyzing audio quality..."):
             info = self.analyze_file(file_path)
@@ -0,0 +1,129 @@
+import struct
+
+# Helpers that locate the audio data inside common containers by reading
+# only the few headers needed to seek past the metadata.
+
+def _syncsafe(data):
+    """Decodes a 28-bit ID3v2 'syncsafe' integer."""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _skip_id3v2(f, offset):
+    """Returns the offset after any ID3v2 tags starting at offset."""
+    while True:
+        f.seek(offset)
+        header = f.read(10)
+        if len(header) < 10 or header[:3] != b'ID3':
+            return offset
+        footer = 10 if header[5] & 0x10 else 0
+        offset += 10 + _syncsafe(header[6:10]) + footer
+
+def _skip_flac_metadata(f, offset):
+    """Returns the offset of the first audio frame if a FLAC stream starts at offset."""
+    f.seek(offset)
+    if f.read(4) != b'fLaC':
+        return offset
+    offset += 4
+    while True:
+        header = f.read(4)
+        if len(header) < 4:
+            return offset
+        offset += 4 + int.from_bytes(header[1:4], 'big')
+        if header[0] & 0x80:  # last-metadata-block flag
+            return offset
+        f.seek(offset)
+
+def read_flac_streaminfo(f):
+    """
+    Returns the STREAMINFO fields of a FLAC file as a dict, or None if f holds no FLAC stream.
+    'audio_start' is the offset of the first audio frame.
+    """
+    start = _skip_id3v2(f, 0)
+    f.seek(start)
+    if f.read(4) != b'fLaC':
+        return None
+    header = f.read(4)
+    data = f.read(34)
+    if len(header) < 4 or header[0] & 0x7F != 0 or len(data) < 34:  # STREAMINFO must come first
+        return None
+    # 20 bits sample rate, 3 bits channels-1, 5 bits bits-per-sample-1, 36 bits total samples
+    packed = int.from_bytes(data[10:18], 'big')
+    return {
+        'min_blocksize': int.from_bytes(data[0:2], 'big'),
+        'max_blocksize': int.from_bytes(data[2:4], 'big'),
+        'min_framesize': int.from_bytes(data[4:7], 'big'),
+        'max_framesize': int.from_bytes(data[7:10], 'big'),
+        'sample_rate': packed >> 44,
+        'channels': ((packed >> 41) & 0x7) + 1,
+        'bits_per_sample': ((packed >> 36) & 0x1F) + 1,
+        'total_samples': packed & ((1 << 36) - 1),  # 0 = unknown
+        'md5': data[18:34],  # all zero = not computed by the encoder
+        'audio_start': _skip_flac_metadata(f, start),
+    }
+
+def _trim_trailing_tags(f, end):
+    """Returns the end offset before ID3v1 and APEv2 tags (in any order)."""
+    while True:
+        if end >= 128:
+            f.seek(end - 128)
+            if f.read(3) == b'TAG':
+                end -= 128
+                continue
+        if end >= 32:
+            f.seek(end - 32)
+            footer = f.read(32)
+            if footer[:8] == b'APETAGEX':
+                tag_size = int.from_bytes(footer[12:16], 'little')
+                flags = int.from_bytes(footer[20:24], 'little')
+                tag_size += 32 if flags & 0x80000000 else 0  # header present
+                if 0 < tag_size <= end:
+                    end -= tag_size
+                    continue
+        return end
+
+def iter_mp4_atoms(f, start, end):
+    """Yields (offset, header_size, atom_size, atom_type) for the atoms between start and end."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        atom_size, atom_type = struct.unpack('>I4s', f.read(8))
+        header_size = 8
+        if atom_size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            atom_size = struct.unpack('>Q', large)[0]
+            header_size = 16
+        elif atom_size == 0:  # atom extends to end of file
+            atom_size = end - offset
+        if atom_size < header_size:
+            return
+        yield offset, header_size, atom_size, atom_type
+        offset += atom_size
+
+def _mp4_mdat_span(f, size):
+    for offset, header_size, atom_size, atom_type in iter_mp4_atoms(f, 0, size):
+        if atom_type == b'mdat':
+            start = offset + header_size
+            return start, min(offset + atom_size, size) - start
+    return None
+
+def audio_payload_span(file_path, size):
+    """
+    Returns (start, length) of the audio payload, skipping ID3v2/ID3v1/APE tags,
+    FLAC metadata blocks and MP4 atoms other than 'mdat'.
+    Unknown formats return the whole file.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(12)
+        if head[4:8] == b'ftyp':
+            span = _mp4_mdat_span(f, size)
+            if span:
+                return span
+            return 0, size
+
+        start = _skip_id3v2(f, 0)
+        start = _skip_flac_metadata(f, start)
+        end = _trim_trailing_tags(f, size)
+        if end < start:
+            return 0, size
+        return start, end - start
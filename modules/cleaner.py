@@ -1,100 +1,203 @@
 import os
-import hashlib
-import shutil
 from collections import defaultdict
 from pathlib import Path
 from rich.progress import Progress
+from modules.hashcache import HashCache
+from modules.hashing import HashEngine, DEFAULT_ALGORITHM, hash_file, hash_partial
+from modules.audioformats import audio_payload_span
+from modules.walker import scan_files
+from modules.fingerprint import FingerprintIndex, compute_fingerprint, FINGERPRINT_BITS, FINGERPRINT_EXTENSIONS
+from modules.fileops import FileOperationExecutor
 
 class CleanModule:
-    def __init__(self, dry_run=False):
+    # Bytes read from the start and the end of a file for the partial hash
+    PARTIAL_BLOCK = 65536
+
+    def __init__(self, dry_run=False, use_cache=True, workers=1, use_processes=False, algorithm=DEFAULT_ALGORITHM):
         self.dry_run = dry_run
+        self.use_cache = use_cache
+        self.algorithm = algorithm
+        self.engine = HashEngine(workers=workers, use_processes=use_processes)
         self.duplicates = defaultdict(list)
+        self.keepers = {}  # hash -> path of the file that stays
+        self.linkable = False  # True if the duplicates are byte-identical to their keeper
+        self.linked_count = 0
         self.file_count = 0
         self.duplicate_count = 0
         self.wasted_size = 0
+        self.skipped_bytes = {'size': 0, 'partial': 0}
 
-    def _get_creation_time(self, path):
+    def _get_creation_time(self, path, stat=None):
         """Returns file creation time (st_birthtime on Mac, ctime on others)."""
         try:
-            stat = os.stat(path)
+            if stat is None:
+                stat = os.stat(path)
             if hasattr(stat, 'st_birthtime'):
                 return stat.st_birthtime
             return stat.st_ctime
         except OSError:
             return 0
 
-    def scan(self, root_path):
-        """Recursively scans files and finds duplicates based on hash, keeping the oldest file."""
+    def scan(self, root_path, audio_only=False):
+        """
+        Finds byte-identical duplicates, keeping the oldest file.
+        Works in stages so that only files which can still be duplicates are read:
+        1. Group by size (a file with a unique size cannot have a duplicate).
+        2. Hash head + tail of each same-size file.
+        3. Full hash only for files that still collide.
+        audio_only: compare only the audio payload (tags and metadata blocks are skipped),
+                    so copies that differ only in their tags are found as well.
+        Paths that are hardlinks to an already seen inode are neither hashed nor counted as duplicates.
+        """
         self.duplicates.clear()
+        self.keepers.clear()
+        self.linkable = not audio_only
+        self.linked_count = 0
         self.file_count = 0
-        hashes = {}
+        self.duplicate_count = 0
+        self.wasted_size = 0
+        self.skipped_bytes = {'size': 0, 'partial': 0}
+        cache = HashCache(root_path) if self.use_cache else None
+        try:
+            files = []
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Collecting file sizes...", total=None)
+            
+                for entry in scan_files(root_path, progress=progress, task=task):
+                    files.append((entry.path, entry.stat, 'span' if audio_only else 'full', None))
+                    self.file_count += 1
+                    progress.advance(task)
         
-        # Count files first for progress bar
-        total_files = sum([len(files) for r, d, files in os.walk(root_path)])
+            # Hardlinks share one inode: hash each inode once, extra links take no extra space
+            seen_inodes = set()
+            unique_files = []
+            for file_path, stat, kind, span in files:
+                inode = (stat.st_dev, stat.st_ino)
+                if stat.st_ino and inode in seen_inodes:
+                    self.linked_count += 1
+                    continue
+                seen_inodes.add(inode)
+                unique_files.append((file_path, stat, kind, span))
         
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Scanning files...", total=total_files)
-            
-            for root, _, files in os.walk(root_path):
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                        
-                    file_path = os.path.join(root, file)
-                    try:
-                        file_hash = self._get_file_hash(file_path)
-                        size = os.path.getsize(file_path)
-                        
-                        if file_hash in hashes:
-                            # Collision found! Compare dates to decide who stays.
-                            keeper_path = hashes[file_hash]
-                            
-                            keeper_time = self._get_creation_time(keeper_path)
-                            current_time = self._get_creation_time(file_path)
-                            
-                            if current_time < keeper_time:
-                                # Current file is OLDER (smaller timestamp). It becomes the new Keeper.
-                                # The old keeper becomes the duplicate (trash).
-                                self.duplicates[file_hash].append(keeper_path)
-                                hashes[file_hash] = file_path # Update keeper (map hash to NEW keeper)
-                                self.wasted_size += os.path.getsize(keeper_path)
-                            else:
-                                # Current file is NEWER (or same). It is the duplicate.
-                                self.duplicates[file_hash].append(file_path)
-                                self.wasted_size += size
-
-                            self.duplicate_count += 1
+            # Stage 1: Group by size (walk order is kept inside each bucket).
+            # In audio mode the size of the audio payload is used, located by reading the headers.
+            size_buckets = defaultdict(list)
+            if audio_only:
+                with Progress() as progress:
+                    task = progress.add_task("[cyan]Locating audio payloads...", total=len(unique_files))
+                    spans = {}
+                    for file_path, stat, _, _, span in self._hash_many(cache, unique_files, audio_only):
+                        if span is None:
+                            self.file_count -= 1
                         else:
-                            hashes[file_hash] = file_path
-                        
-                        self.file_count += 1
+                            spans[file_path] = span
                         progress.advance(task)
-                    except (OSError, PermissionError):
-                        continue
+                for file_path, stat, _, _ in unique_files:
+                    if file_path in spans:
+                        size_buckets[spans[file_path][1]].append((file_path, stat, spans[file_path]))
+            else:
+                for file_path, stat, _, _ in unique_files:
+                    size_buckets[stat.st_size].append((file_path, stat, (0, stat.st_size)))
+        
+            candidates = []
+            for size, entries in size_buckets.items():
+                if len(entries) > 1:
+                    candidates.extend(entries)
+                else:
+                    self.skipped_bytes['size'] += size
+        
+            # Stage 2: Head + tail hash. Small files are read completely, so their hash is final.
+            partial_groups = defaultdict(list)
+            full_groups = defaultdict(list)
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Hashing file heads/tails...", total=len(candidates))
+            
+                jobs = ((path, stat, 'full' if span[1] <= 2 * self.PARTIAL_BLOCK else 'partial', span)
+                        for path, stat, span in candidates)
+                for file_path, stat, kind, span, digest in self._hash_many(cache, jobs, audio_only):
+                    if digest is None:
+                        self.file_count -= 1
+                    elif kind == 'full':
+                        full_groups[digest].append(file_path)
+                    else:
+                        partial_groups[(span[1], digest)].append((file_path, stat, span))
+                    progress.advance(task)
+        
+            # Stage 3: Full hash for files that still collide
+            remaining = []
+            for (size, _), entries in partial_groups.items():
+                if len(entries) > 1:
+                    remaining.extend(entries)
+                else:
+                    self.skipped_bytes['partial'] += size - 2 * self.PARTIAL_BLOCK
+        
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Hashing colliding files...", total=len(remaining))
+            
+                jobs = ((path, stat, 'full', span) for path, stat, span in remaining)
+                for file_path, stat, kind, span, digest in self._hash_many(cache, jobs, audio_only):
+                    if digest is None:
+                        self.file_count -= 1
+                    else:
+                        full_groups[digest].append(file_path)
+                    progress.advance(task)
+        
+            if cache:
+                cache.prune(path for path, _, _, _ in files)
+        finally:
+            if cache:
+                cache.close()
+        
+        # Hashes complete in any order (worker pool). full_groups only merges paths of the
+        # same size bucket, so restoring walk order per group is enough to make keeper
+        # decisions identical to a single sequential pass.
+        walk_order = {path: i for i, (path, _, _) in enumerate(candidates)}
+        groups = [(file_hash, sorted(paths, key=walk_order.__getitem__))
+                  for file_hash, paths in full_groups.items() if len(paths) > 1]
+        for file_hash, paths in sorted(groups, key=lambda group: walk_order[group[1][0]]):
+            self._resolve_group(file_hash, paths)
     
+    def _resolve_group(self, file_hash, paths):
+        """Keeps the oldest file of a group of identical files (first found wins on ties)."""
+        keeper_path = paths[0]
+        keeper_time = self._get_creation_time(keeper_path)
+        
+        for file_path in paths[1:]:
+            current_time = self._get_creation_time(file_path)
+            
+            if current_time < keeper_time:
+                # Current file is OLDER (smaller timestamp). It becomes the new Keeper.
+                # The old keeper becomes the duplicate (trash).
+                self.duplicates[file_hash].append(keeper_path)
+                self.wasted_size += os.path.getsize(keeper_path)
+                keeper_path, keeper_time = file_path, current_time
+            else:
+                # Current file is NEWER (or same). It is the duplicate.
+                self.duplicates[file_hash].append(file_path)
+                self.wasted_size += os.path.getsize(file_path)
+
+            self.duplicate_count += 1
+        
+        self.keepers[file_hash] = keeper_path
     
     def quick_scan(self, root_path):
         """Scans for names based on normalized filenames, keeping the oldest file."""
         import re
         self.duplicates.clear()
+        self.keepers.clear()
+        self.linkable = False
         self.file_count = 0
         self.duplicate_count = 0
         self.wasted_size = 0
         
         # Regex to strip "01 - " style prefixes
         pattern = re.compile(r"^\d+\s*-\s*")
-        seen_names = {} # normalized_name -> original_path (The KEEPER)
-        
-        files_to_check = []
-        for root, _, files in os.walk(root_path):
-            files_to_check.extend([(root, f) for f in files if not f.startswith('.')])
+        seen_names = {} # normalized_name -> (original_path, stat) (The KEEPER)
             
         with Progress() as progress:
-            task = progress.add_task("[cyan]Quick scanning filenames...", total=len(files_to_check))
+            task = progress.add_task("[cyan]Quick scanning filenames...", total=None)
             
-            for root, file in files_to_check:
-                file_path = os.path.join(root, file)
-                
+            for file_path, file, stat in scan_files(root_path, progress=progress, task=task):
                 # Normalize name
                 match = pattern.match(file)
                 if match:
@@ -106,96 +209,230 @@ class CleanModule:
                 
                 if norm_name in seen_names:
                     # Collision
-                    keeper_path = seen_names[norm_name]
+                    keeper_path, keeper_stat = seen_names[norm_name]
                     
-                    keeper_time = self._get_creation_time(keeper_path)
-                    current_time = self._get_creation_time(file_path)
+                    keeper_time = self._get_creation_time(keeper_path, keeper_stat)
+                    current_time = self._get_creation_time(file_path, stat)
                     
                     if current_time < keeper_time:
                         # Current is Older -> Kick out old keeper
                         self.duplicates[norm_name].append(keeper_path)
-                        seen_names[norm_name] = file_path
-                        size = os.path.getsize(keeper_path)
+                        seen_names[norm_name] = (file_path, stat)
+                        size = keeper_stat.st_size
                     else:
                         # Current is Newer -> Trash it
                         self.duplicates[norm_name].append(file_path)
-                        size = os.path.getsize(file_path)
+                        size = stat.st_size
 
                     self.duplicate_count += 1
                     self.wasted_size += size
                 else:
-                    seen_names[norm_name] = file_path
+                    seen_names[norm_name] = (file_path, stat)
                 
                 self.file_count += 1
                 progress.advance(task)
 
-    def _get_file_hash(self, file_path, block_size=65536):
-        """Calculates SHA-256 hash of a file."""
-        sha256 = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            for block in iter(lambda: f.read(block_size), b''):
-                sha256.update(block)
-        return sha256.hexdigest()
+    def fingerprint_scan(self, root_path):
+        """
+        Finds the same recording in different encodings (e.g. 320k MP3 and FLAC) by acoustic fingerprint.
+        Candidate pairs come from an LSH index instead of comparing all pairs.
+        Unlike the hash scans, the best quality copy is kept: lossless first, preferring FLAC and
+        AIFF (tagged) over WAV, lossy files by most bytes per second. The oldest file only wins on ties.
+        """
+        self.duplicates.clear()
+        self.keepers.clear()
+        self.linkable = False
+        self.linked_count = 0
+        self.file_count = 0
+        self.duplicate_count = 0
+        self.wasted_size = 0
+        cache = HashCache(root_path) if self.use_cache else None
+        try:
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Collecting audio files...", total=None)
+                files = []
+                for entry in scan_files(root_path, extensions=FINGERPRINT_EXTENSIONS, progress=progress, task=task):
+                    files.append((entry.path, entry.stat, 'fingerprint', None))
+                    progress.advance(task)
+        
+            index = FingerprintIndex()
+            info = {}  # path -> (stat, duration, fingerprint)
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Fingerprinting audio...", total=len(files))
+                for file_path, stat, _, _, result in self._hash_many(cache, files):
+                    if result is not None:
+                        duration, fingerprint = result
+                        info[file_path] = (stat, duration, fingerprint)
+                        index.add(file_path, duration, fingerprint)
+                        self.file_count += 1
+                    progress.advance(task)
+        
+            if cache:
+                # Only the audio files were walked, so rows of other kinds (hashes, tags) are left alone
+                cache.prune((path for path, _, _, _ in files), kinds=('fingerprint',))
+        finally:
+            if cache:
+                cache.close()
+        
+        # Lossless copies hold the same audio, so only the format decides: the ones with tags first
+        lossless = ('.flac', '.aiff', '.wav')
+        walk_order = {path: i for i, (path, _, _, _) in enumerate(files)}
+        
+        def quality_rank(path):
+            stat, duration, _ = info[path]
+            ext = os.path.splitext(path)[1].lower()
+            if ext in lossless:
+                quality = (0, lossless.index(ext), 0.0)
+            else:
+                quality = (1, 0, -stat.st_size / max(duration, 1.0))
+            return (*quality, self._get_creation_time(path, stat), walk_order[path])
+        
+        for group in sorted(index.groups(), key=lambda g: min(walk_order[p] for p in g)):
+            group.sort(key=quality_rank)
+            keeper_path = group[0]
+            key = f"{info[keeper_path][2]:0{FINGERPRINT_BITS // 4}x}"
+            self.keepers[key] = keeper_path
+            for file_path in group[1:]:
+                self.duplicates[key].append(file_path)
+                self.duplicate_count += 1
+                self.wasted_size += info[file_path][0].st_size
+
+    def _hash_many(self, cache, entries, audio_only=False):
+        """
+        Runs (path, stat, kind, span) entries on the hash engine. kind is one of
+        'span'    -> locate the audio payload, result is (start, length)
+        'partial' -> head + tail hash of span
+        'full'    -> hash of span
+        'fingerprint' -> acoustic fingerprint, result is (duration, fingerprint) or None
+        Yields (path, stat, kind, span, result) in completion order; result is None if the file could not be read.
+        Cache lookups and writes stay in the calling thread.
+        """
+        cache_hits = []
+        suffix = ':audio' if audio_only else ''
+
+        def cache_key(kind):
+            return kind if kind in ('span', 'fingerprint') else f"{kind}:{self.algorithm}{suffix}"
+
+        def encode(kind, result):
+            if kind == 'span':
+                return f"{result[0]}:{result[1]}"
+            if kind == 'fingerprint':
+                return "" if result is None else f"{result[0]:.3f}:{result[1]:x}"
+            return result
+
+        def decode(kind, value):
+            if kind == 'span':
+                return tuple(int(x) for x in value.split(':'))
+            if kind == 'fingerprint':
+                if not value:
+                    return None
+                duration, fingerprint = value.split(':')
+                return float(duration), int(fingerprint, 16)
+            return value
+
+        def jobs():
+            for file_path, stat, kind, span in entries:
+                value = cache.get(file_path, cache_key(kind), stat) if cache else None
+                if value is not None:
+                    cache_hits.append((file_path, stat, kind, span, decode(kind, value)))
+                    continue
+                key = (file_path, stat, kind, span)
+                if kind == 'fingerprint':
+                    yield key, compute_fingerprint, (file_path,)
+                elif kind == 'span':
+                    yield key, audio_payload_span, (file_path, stat.st_size)
+                elif kind == 'partial':
+                    yield key, hash_partial, (file_path, span[1], self.PARTIAL_BLOCK, self.algorithm, span[0])
+                else:
+                    yield key, hash_file, (file_path, self.algorithm, span[0], span[1])
+
+        for (file_path, stat, kind, span), result, error in self.engine.imap(jobs()):
+            while cache_hits:
+                yield cache_hits.pop()
+            if error is None and cache:
+                cache.put(file_path, cache_key(kind), stat, encode(kind, result))
+            yield file_path, stat, kind, span, result
+        while cache_hits:
+            yield cache_hits.pop()
+
+    def _payload_spans(self, cache, entries, audio_only=False):
+        """
+        Yields (path, stat, span) for (path, stat) entries, span being (start, length) of the bytes to compare.
+        Without audio_only this is the whole file and nothing is read.
+        """
+        if not audio_only:
+            for file_path, stat in entries:
+                yield file_path, stat, (0, stat.st_size)
+            return
+        located = self._hash_many(cache, ((path, stat, 'span', None) for path, stat in entries), True)
+        for file_path, stat, _, _, span in located:
+            yield file_path, stat, span or (0, stat.st_size)
 
     def report(self):
         """Returns a summary of the scan."""
         return {
             "total_files": self.file_count,
             "duplicates": self.duplicate_count,
-            "wasted_size_mb": self.wasted_size / (1024 * 1024)
+            "already_linked": self.linked_count,
+            "wasted_size_mb": self.wasted_size / (1024 * 1024),
+            "skipped_by_size_mb": self.skipped_bytes['size'] / (1024 * 1024),
+            "skipped_by_partial_mb": self.skipped_bytes['partial'] / (1024 * 1024)
         }
 
     def deduplicate(self, mode, root_path):
         """
         Executes deduplication based on mode.
-        mode: 'delete' or 'move'
+        mode: 'delete', 'move' or 'link' (replace each duplicate with a reflink/hardlink
+              to its keeper, so every path stays valid, e.g. for Rekordbox playlists)
         """
+        if mode == 'link' and not self.linkable:
+            return ["[ERROR] Link mode needs a byte-exact Deep Scan (identical files)."]
+
         trash_dir = os.path.join(root_path, "_DUPLICATES_TRASH")
         if mode == 'move' and not os.path.exists(trash_dir):
             os.makedirs(trash_dir, exist_ok=True)
             
         results = []
+        actions = {'delete': "Deleted", 'move': "Moved", 'link': "Linked"}
+        executor = FileOperationExecutor(root_path)
+        ops = []
         
         for file_hash, paths in self.duplicates.items():
             for file_path in paths:
-                # 'paths' contains ONLY the duplicates (2nd, 3rd occurrence etc.)
-                # Verify this logic: 
-                # In scan: if file_hash in hashes -> self.duplicates[file_hash].append(file_path)
-                # Yes, so the first file found is NOT in self.duplicates[file_hash].
-                
-                action = "Deleted" if mode == 'delete' else "Moved"
-                
+                # 'paths' contains ONLY the duplicates, the keeper is in self.keepers[file_hash]
                 if self.dry_run:
-                    results.append(f"[DRY-RUN] Would {action}: {file_path}")
+                    results.append(f"[DRY-RUN] Would {actions[mode]}: {file_path}")
                     continue
-                    
-                try:
-                    if mode == 'delete':
-                        os.remove(file_path)
-                        results.append(f"Deleted: {file_path}")
-                    elif mode == 'move':
-                        dest = os.path.join(trash_dir, os.path.basename(file_path))
-                        # Handle name collision in trash
-                        if os.path.exists(dest):
-                            base, ext = os.path.splitext(dest)
-                            dest = f"{base}_{file_hash[:8]}{ext}"
-                        shutil.move(file_path, dest)
-                        results.append(f"Moved: {file_path} -> {dest}")
-                except Exception as e:
-                    results.append(f"[ERROR] Failed to {action} {file_path}: {e}")
+                
+                if mode == 'delete':
+                    ops.append(executor.plan_delete(file_path))
+                elif mode == 'move':
+                    # Name collisions in trash get the hash appended
+                    ops.append(executor.plan_move(file_path, trash_dir, tag=file_hash[:8]))
+                elif mode == 'link':
+                    ops.append(executor.plan_link(file_path, self.keepers[file_hash]))
+        
+        for op, error in executor.execute(f"dedupe-{mode}", ops):
+            if error:
+                results.append(f"[ERROR] Failed to {actions[mode]} {op['src']}: {error}")
+            elif mode == 'delete':
+                results.append(f"Deleted: {op['src']}")
+            elif mode == 'move':
+                results.append(f"Moved: {op['src']} -> {op['dst']}")
+            elif mode == 'link':
+                results.append(f"Linked ({op['method']}): {op['src']} -> {op['dst']}")
                     
         return results
 
     def scan_import(self, source_path, library_path, comparison='hash'):
         """
         Scans source_path for files that exist in library_path.
-        comparison: 'hash' (content) or 'filename' (normalized name)
+        comparison: 'hash' (content), 'audio' (audio payload only, ignores tags) or 'filename' (normalized name)
         Returns list of duplicate file paths in source_path.
+        For hash comparisons the (usually small) import folder is indexed by size first,
+        so only library files with a matching size are read.
         """
         import re
-        # 1. Index Library
-        library_fingerprints = set()
-        
         # Regex for filename normalization
         pattern = re.compile(r"^\d+\s*-\s*")
         
@@ -205,58 +442,89 @@ class CleanModule:
                 return name[len(match.group(0)):].lower()
             return name.lower()
 
+        hashed = comparison in ('hash', 'audio')
+        audio_only = comparison == 'audio'
+
+        # 1. Index Source by size (or audio payload size)
         with Progress() as progress:
-            task = progress.add_task("[cyan]Indexing library...", total=None)
-            total_files = sum([len(files) for r, d, files in os.walk(library_path)])
-            progress.update(task, total=total_files)
+            task = progress.add_task("[magenta]Indexing import folder...", total=None)
+            source_files = list(scan_files(source_path, progress=progress, task=task))
             
-            for root, _, files in os.walk(library_path):
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                        
-                    file_path = os.path.join(root, file)
-                    try:
-                        if comparison == 'hash':
-                            fingerprint = self._get_file_hash(file_path)
-                        else: # filename
-                            fingerprint = normalize(file)
-                            
-                        library_fingerprints.add(fingerprint)
+            source_spans = {}
+            if hashed:
+                entries = ((entry.path, entry.stat) for entry in source_files)
+                for file_path, stat, span in self._payload_spans(None, entries, audio_only):
+                    source_spans[file_path] = (stat, span)
+                    progress.advance(task)
+            else:
+                progress.update(task, completed=len(source_files))
+        source_sizes = {span[1] for _, span in source_spans.values()}
+
+        # 2. Index Library (only size matches are hashed)
+        library_fingerprints = set()
+        library_sizes = set()
+        cache = HashCache(library_path) if self.use_cache and hashed else None
+        try:
+            seen_paths = []
+
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Indexing library...", total=None)
+                library_files = scan_files(library_path, progress=progress, task=task)
+            
+                if hashed:
+                    entries = ((entry.path, entry.stat) for entry in library_files)
+                    to_hash = []
+                    for file_path, stat, span in self._payload_spans(cache, entries, audio_only):
+                        seen_paths.append(file_path)
+                        if span[1] in source_sizes:
+                            to_hash.append((file_path, stat, 'full', span))
+                            library_sizes.add(span[1])
                         progress.advance(task)
-                    except:
-                        continue
+                
+                    hash_task = progress.add_task("[cyan]Hashing size matches...", total=len(to_hash))
+                    for _, _, _, _, digest in self._hash_many(cache, to_hash, audio_only):
+                        if digest is not None:
+                            library_fingerprints.add(digest)
+                        progress.advance(hash_task)
+                else:
+                    for entry in library_files:
+                        library_fingerprints.add(normalize(entry.name))
+                        progress.advance(task)
+        
+            if cache:
+                cache.prune(seen_paths)
+        finally:
+            if cache:
+                cache.close()
                         
-        # 2. Scan Source
+        # 3. Scan Source
         duplicates_found = []
         with Progress() as progress:
-            task = progress.add_task(f"[magenta]Scanning import folder ({comparison})...", total=None)
-            total_source = sum([len(files) for r, d, files in os.walk(source_path)])
-            progress.update(task, total=total_source)
+            fingerprints = {}
+            if hashed:
+                to_hash = [(file_path, stat, 'full', span) for file_path, (stat, span) in source_spans.items()
+                           if span[1] in library_sizes]
+                task = progress.add_task(f"[magenta]Scanning import folder ({comparison})...", total=len(to_hash))
+                for file_path, _, _, _, digest in self._hash_many(None, to_hash, audio_only):
+                    fingerprints[file_path] = digest
+                    progress.advance(task)
+            else:
+                task = progress.add_task(f"[magenta]Scanning import folder ({comparison})...", total=len(source_files))
+                for entry in source_files:
+                    fingerprints[entry.path] = normalize(entry.name)
+                    progress.advance(task)
             
-            for root, _, files in os.walk(source_path):
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                        
-                    file_path = os.path.join(root, file)
-                    try:
-                        if comparison == 'hash':
-                            fingerprint = self._get_file_hash(file_path)
-                        else:
-                            fingerprint = normalize(file)
-                            
-                        if fingerprint in library_fingerprints:
-                            duplicates_found.append(file_path)
-                        progress.advance(task)
-                    except:
-                        continue
+            # Report in walk order, independent of hashing order
+            for entry in source_files:
+                if fingerprints.get(entry.path) in library_fingerprints:
+                    duplicates_found.append(entry.path)
                         
         return duplicates_found
 
-    def resolve_import_duplicates(self, duplicates, source_path, mode='delete'):
+    def resolve_import_duplicates(self, duplicates, source_path, mode='delete', library_path=None):
         """
         Deletes or moves the list of duplicate files.
+        library_path: library root whose journal records the batch (default: source_path)
         """
         results = []
         trash_dir = os.path.join(source_path, "_ALREADY_IN_LIB")
@@ -264,25 +532,25 @@ class CleanModule:
         if mode == 'move' and not os.path.exists(trash_dir):
             os.makedirs(trash_dir, exist_ok=True)
             
+        executor = FileOperationExecutor(library_path or source_path)
+        ops = []
         for file_path in duplicates:
             action = "Deleted" if mode == 'delete' else "Moved"
             if self.dry_run:
                 results.append(f"[DRY-RUN] Would {action}: {file_path}")
                 continue
+            
+            if mode == 'delete':
+                ops.append(executor.plan_delete(file_path))
+            elif mode == 'move':
+                ops.append(executor.plan_move(file_path, trash_dir))
                 
-            try:
-                if mode == 'delete':
-                    os.remove(file_path)
-                    results.append(f"Deleted: {file_path}")
-                elif mode == 'move':
-                    dest = os.path.join(trash_dir, os.path.basename(file_path))
-                    # Handle name collision
-                    if os.path.exists(dest):
-                         base, ext = os.path.splitext(dest)
-                         dest = f"{base}_{self._get_file_hash(file_path)[:8]}{ext}"
-                    shutil.move(file_path, dest)
-                    results.append(f"Moved: {file_path} -> {dest}")
-            except Exception as e:
-                results.append(f"[ERROR] {file_path}: {e}")
+        for op, error in executor.execute(f"import-{mode}", ops):
+            if error:
+                results.append(f"[ERROR] {op['src']}: {error}")
+            elif mode == 'delete':
+                results.append(f"Deleted: {op['src']}")
+            else:
+                results.append(f"Moved: {op['src']} -> {op['dst']}")
                 
         return results
@@ -1,69 +1,283 @@
 import os
+import csv
+import itertools
+import time
+import random
 import shutil
+import hashlib
+import threading
+import numpy as np
 import soundfile as sf
 import subprocess
 from rich.progress import Progress
+from rich.markup import escape
+from modules.walker import scan_files
+from modules.fileops import FileOperationExecutor
+from modules.hashing import HashEngine
+from modules.audioformats import read_flac_streaminfo
+from modules.flacstructure import check_flac_structure
+from modules.verdictstore import VerdictStore
+from modules.validators import VALIDATORS, validate_file
+
+DECODERS = ('builtin', 'flac')
+HEALTH_EXTENSIONS = ('.flac',) + tuple(VALIDATORS)
+DECODE_FRAMES = 1 << 16  # frames per read (~256 KB of 16-bit stereo)
+# libsndfile decodes FLAC at these widths; 8-bit comes back shifted into int16, 24-bit into int32
+SAMPLE_DTYPES = {8: 'int16', 16: 'int16', 24: 'int32'}
+
+_local = threading.local()
+
+def _get_buffers(channels, dtype, width):
+    """
+    Returns (samples, packed): decode buffers reused for every file checked by this thread.
+    packed holds the samples cut down to the width FLAC hashes (e.g. 3 bytes for 24-bit).
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    key = (channels, dtype, width)
+    if key not in buffers:
+        samples = np.empty((DECODE_FRAMES, channels), dtype=dtype)
+        packed = np.empty((DECODE_FRAMES * channels, width), dtype=np.uint8) if samples.itemsize != width else None
+        buffers[key] = (samples, packed)
+    return buffers[key]
+
+def decode_flac(file_path):
+    """
+    Decodes the whole file in-process and compares the PCM with the MD5 in STREAMINFO,
+    which is what flac -t does. Returns None if the file is healthy, otherwise a short reason.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            info = read_flac_streaminfo(f)
+    except OSError as e:
+        return f"Unreadable: {e}"
+    if info is None:
+        return "No FLAC header"
+
+    dtype = SAMPLE_DTYPES.get(info['bits_per_sample'])
+    width = (info['bits_per_sample'] + 7) // 8
+    # The MD5 covers the samples as signed little-endian integers of 'width' bytes, channels interleaved
+    md5 = hashlib.md5() if dtype and any(info['md5']) else None
+    decoded = 0
+    try:
+        with sf.SoundFile(file_path) as f:
+            samples, packed = _get_buffers(f.channels, dtype or 'int32', width)
+            while True:
+                block = f.read(len(samples), dtype=samples.dtype, out=samples)
+                n = len(block)
+                if not n:
+                    break
+                decoded += n
+                if md5 is None:
+                    continue
+                if packed is None:
+                    md5.update(block)
+                else:
+                    # Keep the high bytes of each sample (little-endian: the last ones)
+                    count = n * f.channels
+                    raw = samples.reshape(-1).view(np.uint8).reshape(-1, samples.itemsize)
+                    np.copyto(packed[:count], raw[:count, samples.itemsize - width:])
+                    md5.update(packed[:count])
+    except (RuntimeError, OSError, sf.LibsndfileError) as e:
+        return f"Decode error: {' '.join(str(e).split())}"
+
+    if info['total_samples'] and decoded != info['total_samples']:
+        return f"Truncated: {decoded} of {info['total_samples']} samples"
+    if md5 is not None and md5.digest() != info['md5']:
+        return "MD5 Checksum Failed"
+    return None
+
+def check_flac(file_path, flac_binary=None):
+    """
+    Returns None if the file looks healthy, otherwise a short reason.
+    Decodes in-process unless the path of the flac binary is given (flac -t per file).
+    """
+    if flac_binary is None:
+        return decode_flac(file_path)
+
+    try:
+        with sf.SoundFile(file_path):
+            pass
+    except Exception as e:
+        return f"Unreadable: {' '.join(str(e).split())}"
+
+    # -t: test (decodes everything and compares the MD5 in STREAMINFO), -s: silent
+    result = subprocess.run([flac_binary, '-t', '-s', file_path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode == 0:
+        return None
+    lines = [line.strip() for line in result.stderr.decode(errors='replace').splitlines() if line.strip()]
+    detail = lines[-1].split(': ', 1)[-1] if lines else f"exit code {result.returncode}"
+    return f"flac -t failed: {detail}"
+
+def read_audio_md5(file_path):
+    """Returns the audio MD5 from STREAMINFO as hex ('' if the file has no FLAC header)."""
+    with open(file_path, 'rb') as f:
+        info = read_flac_streaminfo(f)
+    return info['md5'].hex() if info else ''
 
 class HealthGuard:
-    def __init__(self, dry_run=False):
+    def __init__(self, dry_run=False, workers=None, decoder='builtin', use_cache=True, max_age_days=None):
+        if decoder not in DECODERS:
+            raise ValueError(f"decoder must be one of {DECODERS}")
         self.dry_run = dry_run
+        # libsndfile and flac -t both decode outside the GIL, so threads are enough to use every core
+        self.workers = workers or os.cpu_count() or 1
+        self.decoder = decoder
+        # Looked up once; without the binary the built-in decoder is used
+        self.flac_binary = shutil.which('flac') if decoder == 'flac' else None
+        self.use_cache = use_cache
+        # Passing verdicts older than this are checked again (bit rot sweep); None = trust them forever
+        self.max_age_days = max_age_days
         self.corrupt_files = []
+        self.reasons = {}  # path -> why it was flagged
+        self.tiers = {}  # path -> check that flagged it ('structure', 'decode' or 'format')
+        self.skipped = 0  # unchanged files that passed before and weren't checked again
 
-    def scan_flac(self, root_path):
-        """Scans FLAC files for corruption using soundfile and flac -t."""
+    def _trusted(self, verdict, quick):
+        """True if a stored verdict means the file doesn't need to be checked now."""
+        if verdict is None:
+            return False
+        status, tier, checked_at = verdict
+        if status != VerdictStore.OK:
+            return False  # failed files are always checked again
+        if tier == 'structure' and not quick:
+            return False  # the full check wants a decode
+        if self.max_age_days is not None and time.time() - checked_at > self.max_age_days * 86400:
+            return False
+        return True
+
+    def scan_flac(self, root_path, quick=False, decode_sample=0.0):
+        """Scans FLAC files only (see scan)."""
+        return self.scan(root_path, quick, decode_sample, extensions=('.flac',))
+
+    def scan(self, root_path, quick=False, decode_sample=0.0, extensions=HEALTH_EXTENSIONS):
+        """
+        Scans audio files for corruption, several files at a time.
+        FLAC, full check: every file is decoded (MD5 check).
+        FLAC, quick=True: every file gets the structural check (a few KB read per file); only the
+        files it flags and a random decode_sample fraction (0-1) of the others are decoded.
+        MP3/M4A/WAV/AIFF: always the format validator (frame/atom/chunk walk, tier 'format').
+        Files that passed before and are unchanged (path, size, mtime, audio MD5) are skipped.
+        self.tiers records which check flagged each corrupt file ('structure', 'decode' or 'format').
+        """
         self.corrupt_files = []
-        flac_files = []
-        
-        # Collect FLAC files
-        ignored_folders = {'_CORRUPT_FILES', '_DUPLICATES_TRASH', '_ALREADY_IN_LIB'}
-        for root, dirs, files in os.walk(root_path):
-            # Modify dirs in-place to skip ignored folders
-            dirs[:] = [d for d in dirs if d not in ignored_folders and not d.startswith('.')]
-            
-            for file in files:
-                if file.startswith('.'):
-                    continue
-                if file.lower().endswith('.flac'):
-                    flac_files.append(os.path.join(root, file))
+        self.reasons = {}
+        self.tiers = {}
+        self.skipped = 0
+        # Collect files (trash/quarantine folders are skipped by the walker)
+        entries = list(scan_files(root_path, extensions=extensions))
+        all_files = [entry.path for entry in entries]
+        flac_files = [path for path in all_files if path.lower().endswith('.flac')]
         
-        if not flac_files:
+        if not all_files:
             return []
 
-        with Progress() as progress:
-            task = progress.add_task("[red]Checking FLAC integrity...", total=len(flac_files))
-            
-            for file_path in flac_files:
-                is_corrupt = False
-                # Method 1: Try opening with soundfile
-                try:
-                    with sf.SoundFile(file_path) as f:
-                        pass
-                except Exception:
-                    is_corrupt = True
-                
-                # Method 2: 'flac -t' (Test) if method 1 passed but we want to be sure, 
-                # or if method 1 failed we already know. 
-                # Ideally 'flac -t' is better. Let's try subprocess if installed.
-                if not is_corrupt:
-                    try:
-                        # -t: test, -s: silent
-                        subprocess.check_call(['flac', '-t', '-s', file_path], stderr=subprocess.DEVNULL)
-                    except (subprocess.CalledProcessError, FileNotFoundError):
-                        # If flac is not found, we rely on soundfile. 
-                        # If CalledProcessError, it failed the test.
-                        # Check if it was FileNotFoundError (tool missing) or CalledProcessError (corrupt)
-                        # We can check if shutil.which('flac') exists once ideally.
-                        if shutil.which('flac'):
-                             # It really failed the test
-                             is_corrupt = True
-                        
-                if is_corrupt:
-                    self.corrupt_files.append(file_path)
-                
-                progress.advance(task)
-                
+        engine = HashEngine(workers=self.workers)
+        store = VerdictStore(root_path) if self.use_cache else None
+        try:
+            with Progress() as progress:
+                if self.decoder == 'flac' and self.flac_binary is None:
+                    progress.console.print("[yellow]'flac' not found: using the built-in decoder.[/yellow]")
+
+                stats = {entry.path: entry.stat for entry in entries}
+                audio_md5s = dict.fromkeys(all_files, '')  # only FLAC stores one in its header
+                to_check = all_files
+                failed_before = set()
+                if store:
+                    if flac_files:
+                        task = progress.add_task("[cyan]Reading FLAC headers...", total=len(flac_files))
+                        jobs = ((file_path, read_audio_md5, (file_path,)) for file_path in flac_files)
+                        for file_path, audio_md5, error in engine.imap(jobs):
+                            audio_md5s[file_path] = audio_md5 or ''
+                            progress.advance(task)
+                    verdicts = {path: store.get(path, stats[path], audio_md5s[path]) for path in all_files}
+                    to_check = [path for path in all_files if not self._trusted(verdicts[path], quick)]
+                    self.skipped = len(all_files) - len(to_check)
+                    failed_before = {path for path in to_check
+                                     if verdicts[path] and verdicts[path][0] == VerdictStore.CORRUPT}
+                flac_check = [path for path in to_check if path.lower().endswith('.flac')]
+                other_check = [path for path in to_check if not path.lower().endswith('.flac')]
+
+                suspects = {}
+                to_decode = flac_check
+                if quick and flac_check:
+                    task = progress.add_task("[yellow]Checking FLAC structure...", total=len(flac_check))
+                    jobs = ((file_path, check_flac_structure, (file_path,)) for file_path in flac_check)
+                    for file_path, reason, error in engine.imap(jobs):
+                        if error is not None:
+                            reason = f"Unreadable: {error}"
+                        if reason:
+                            suspects[file_path] = reason
+                        progress.advance(task)
+                    # Structural findings are confirmed by a full decode before anything is flagged.
+                    # Files that failed before are decoded again too: the structure check may miss what failed.
+                    others = [path for path in flac_check if path not in suspects and path not in failed_before]
+                    sample = set(random.sample(others, round(len(others) * decode_sample))) | failed_before
+                    to_decode = [path for path in flac_check if path in suspects or path in sample]
+                    if store:
+                        for path in others:
+                            if path not in sample:
+                                store.put(path, stats[path], audio_md5s[path], VerdictStore.OK, 'structure')
+
+                # FLAC decodes and the other formats' validators share one pool
+                task = progress.add_task("[red]Checking integrity...", total=len(to_decode) + len(other_check))
+                jobs = itertools.chain(
+                    ((file_path, check_flac, (file_path, self.flac_binary)) for file_path in to_decode),
+                    ((file_path, validate_file, (file_path,)) for file_path in other_check),
+                )
+                for file_path, reason, error in engine.imap(jobs):
+                    if error is not None:
+                        reason = f"Unreadable: {error}"
+                    if not file_path.lower().endswith('.flac'):
+                        tier = 'format'
+                    else:
+                        tier = 'structure' if file_path in suspects else 'decode'
+                    if reason:
+                        self.reasons[file_path] = suspects.get(file_path, reason)
+                        self.tiers[file_path] = tier
+                        # Live log: flagged files show up while the scan is still running
+                        progress.console.print(f"[red][ERROR] {escape(os.path.basename(file_path))} is corrupt "
+                                               f"({escape(self.reasons[file_path])}, {tier} check)[/red]")
+                    if store:
+                        # A structural suspect that decodes fine passed the decode
+                        status = VerdictStore.CORRUPT if reason else VerdictStore.OK
+                        verdict_tier = tier if reason or tier == 'format' else 'decode'
+                        store.put(file_path, stats[file_path], audio_md5s[file_path], status,
+                                  verdict_tier, self.reasons.get(file_path))
+                    progress.advance(task)
+            if store:
+                # Only rows of the scanned formats can be judged stale here
+                store.prune(all_files, extensions)
+        finally:
+            if store:
+                store.close()
+
+        # Report in walk order, not in completion order
+        self.corrupt_files = [path for path in all_files if path in self.reasons]
         return self.corrupt_files
 
+    def export_report(self, root_path, report_path="corrupt_files_report.csv"):
+        """
+        Writes every file known to be corrupt to a CSV: with the verdict store that includes
+        files found by earlier runs, so the report covers the whole library. Returns the count.
+        """
+        store = VerdictStore(root_path) if self.use_cache else None
+        try:
+            rows = store.corrupt() if store and store.conn else [
+                (path, self.tiers[path], self.reasons[path], None) for path in self.corrupt_files]
+        finally:
+            if store:
+                store.close()
+        with open(report_path, "w", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Filename", "Flagged By", "Reason", "Checked"])
+            for path, tier, reason, checked_at in rows:
+                checked = time.strftime('%Y-%m-%d %H:%M', time.localtime(checked_at)) if checked_at else ''
+                writer.writerow([path, tier, reason, checked])
+        return len(rows)
+
     def quarantine(self, root_path):
         """Moves corrupt files to a quarantine folder."""
         quarantine_dir = os.path.join(root_path, "_CORRUPT_FILES")
@@ -71,21 +285,25 @@ class HealthGuard:
             os.makedirs(quarantine_dir, exist_ok=True)
             
         results = []
+        executor = FileOperationExecutor(root_path)
+        ops = []
         for file_path in self.corrupt_files:
             if self.dry_run:
                 results.append(f"[DRY-RUN] Would move to quarantine: {file_path}")
                 continue
-                
-            try:
-                dest = os.path.join(quarantine_dir, os.path.basename(file_path))
-                if os.path.exists(dest):
-                    base, ext = os.path.splitext(dest)
-                    import uuid
-                    dest = f"{base}_{uuid.uuid4().hex[:6]}{ext}"
-                    
-                shutil.move(file_path, dest)
-                results.append(f"Quarantined: {file_path}")
-            except Exception as e:
-                results.append(f"[ERROR] Failed to quarantine {file_path}: {e}")
+            ops.append(executor.plan_move(file_path, quarantine_dir))
+            
+        moved = []
+        for op, error in executor.execute("quarantine", ops):
+            if error:
+                results.append(f"[ERROR] Failed to quarantine {op['src']}: {error}")
+            else:
+                results.append(f"Quarantined: {op['src']}")
+                moved.append(op['src'])
+
+        if moved and self.use_cache:
+            store = VerdictStore(root_path)
+            store.forget(moved)
+            store.close()
                 
         return results
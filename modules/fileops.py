@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import uuid
+import shutil
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Linux ioctl to share extents between two files (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+def reflink(src, dst):
+    """
+    Creates dst as copy-on-write clone of src. Raises OSError if the filesystem
+    (or platform) does not support reflinks.
+    """
+    if sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), dst)
+        return
+
+    import fcntl
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'xb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+
+def replace_with_link(keeper_path, file_path):
+    """
+    Atomically replaces file_path with a reflink (preferred) or hardlink to keeper_path.
+    The link is created next to file_path and renamed over it, so file_path always exists.
+    Returns 'reflink' or 'hardlink'.
+    """
+    directory, name = os.path.split(file_path)
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        try:
+            reflink(keeper_path, tmp_path)
+            method = 'reflink'
+        except OSError:
+            os.link(keeper_path, tmp_path)
+            method = 'hardlink'
+        os.replace(tmp_path, file_path)
+    except OSError:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return method
+
+
+class FileOperationExecutor:
+    """
+    Runs a batch of file operations and records it in an append-only journal,
+    so an interrupted batch can be resumed and a finished one undone.
+
+    Operations are dicts {'type': ..., 'src': ..., 'dst': ...} with type
+    'move', 'rename', 'delete' or 'link' (src is replaced by a link to dst),
+    paths absolute so a journal can be replayed from any working directory.
+    Journals are kept in JOURNAL_DIR in the library root.
+    Target names are planned in memory from one listing per directory, compared
+    case-insensitively (APFS, exFAT and FAT volumes treat 'A.mp3' and 'a.mp3' as one file).
+    Same-device moves are plain renames; cross-device moves (copies) run in parallel.
+    """
+    JOURNAL_DIR = ".dj_journal"
+
+    def __init__(self, root_path, workers=4, journal_dir=None):
+        self.workers = workers
+        self.journal_dir = os.path.abspath(journal_dir or os.path.join(root_path, self.JOURNAL_DIR))
+        self._listings = {}
+        self._devices = {}
+
+    # --- Planning ---
+
+    def _listing(self, directory):
+        """Casefolded names in directory (listed once per batch) plus the names already planned into it."""
+        if directory not in self._listings:
+            try:
+                self._listings[directory] = {name.casefold() for name in os.listdir(directory)}
+            except OSError:
+                self._listings[directory] = set()
+        return self._listings[directory]
+
+    def plan_move(self, src, target_dir, tag=None):
+        """Plans moving src into target_dir. Name collisions get _<tag> and/or a counter appended."""
+        src, target_dir = os.path.abspath(src), os.path.abspath(target_dir)
+        names = self._listing(target_dir)
+        name = os.path.basename(src)
+        base, ext = os.path.splitext(name)
+        if name.casefold() in names and tag:
+            base = f"{base}_{tag}"
+            name = f"{base}{ext}"
+        counter = 1
+        while name.casefold() in names:
+            name = f"{base}_{counter}{ext}"
+            counter += 1
+        names.add(name.casefold())
+        return {'type': 'move', 'src': src, 'dst': os.path.join(target_dir, name)}
+
+    def plan_rename(self, src, dst):
+        """Plans a rename. Returns None if dst already exists or is already taken by this batch."""
+        src, dst = os.path.abspath(src), os.path.abspath(dst)
+        names = self._listing(os.path.dirname(dst))
+        name = os.path.basename(dst).casefold()
+        # A change of case only ('track.mp3' -> 'Track.mp3') is not a collision with itself
+        if name in names and not (os.path.dirname(src) == os.path.dirname(dst)
+                                  and os.path.basename(src).casefold() == name):
+            return None
+        if os.path.dirname(src) == os.path.dirname(dst):
+            names.discard(os.path.basename(src).casefold())
+        names.add(name)
+        return {'type': 'rename', 'src': src, 'dst': dst}
+
+    def plan_delete(self, src):
+        return {'type': 'delete', 'src': os.path.abspath(src)}
+
+    def plan_link(self, src, keeper_path):
+        return {'type': 'link', 'src': os.path.abspath(src), 'dst': os.path.abspath(keeper_path)}
+
+    # --- Execution ---
+
+    def execute(self, label, ops):
+        """Journals and runs ops. Returns [(op, error)] in plan order, error being None on success."""
+        if not ops:
+            return []
+        os.makedirs(self.journal_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        journal_path = os.path.join(self.journal_dir, f"{stamp}_{label}_{uuid.uuid4().hex[:6]}.jsonl")
+        with open(journal_path, 'w', encoding='utf-8') as journal:
+            lines = [json.dumps({'label': label, 'created': datetime.now().isoformat(timespec='seconds')})]
+            lines += [json.dumps({'plan': i, 'op': op}) for i, op in enumerate(ops)]
+            journal.write("\n".join(lines) + "\n")
+        return self._run(journal_path, list(enumerate(ops)))
+
+    def _device(self, directory):
+        if directory not in self._devices:
+            self._devices[directory] = os.stat(directory).st_dev
+        return self._devices[directory]
+
+    def _needs_copy(self, op):
+        """True for moves across devices (data has to be copied)."""
+        if op['type'] != 'move':
+            return False
+        try:
+            return self._device(os.path.dirname(op['src'])) != self._device(os.path.dirname(op['dst']))
+        except OSError:
+            return True
+
+    @staticmethod
+    def _apply(op, copy=False):
+        kind, src, dst = op['type'], op['src'], op.get('dst')
+        if kind == 'delete':
+            os.remove(src)
+        elif kind == 'link':
+            op['method'] = replace_with_link(dst, src)
+        elif kind == 'unlink':
+            # Turn a link back into an independent copy (undo of 'link')
+            tmp_path = f"{src}.{uuid.uuid4().hex[:8]}.tmp"
+            shutil.copy2(src, tmp_path)
+            os.replace(tmp_path, src)
+        else:
+            # Never overwrite: rename() would silently replace an existing target.
+            # A case-only rename finds src itself on case-insensitive volumes.
+            case_only = kind == 'rename' and src.casefold() == dst.casefold() and src != dst
+            if os.path.lexists(dst) and not (case_only and os.path.samefile(src, dst)):
+                raise FileExistsError(f"Target exists: {dst}")
+            if copy:
+                shutil.move(src, dst)
+            else:
+                os.rename(src, dst)
+
+    @staticmethod
+    def _ends_torn(journal_path):
+        """True if the journal's last line is incomplete (crash while it was written)."""
+        with open(journal_path, 'rb') as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def _run(self, journal_path, indexed_ops, state='done', failed_state='failed'):
+        errors = {}
+        local = [(i, op) for i, op in indexed_ops if not self._needs_copy(op)]
+        copies = [(i, op) for i, op in indexed_ops if self._needs_copy(op)]
+
+        torn = self._ends_torn(journal_path)
+        with open(journal_path, 'a', encoding='utf-8') as journal:
+            if torn:
+                # New entries must not be glued to the torn line
+                journal.write("\n")
+
+            def log(i, error):
+                errors[i] = error
+                if error is None:
+                    entry = {state: i}
+                else:
+                    entry = {failed_state: i, 'error': str(error)}
+                journal.write(json.dumps(entry) + "\n")
+                journal.flush()
+
+            for i, op in local:
+                try:
+                    self._apply(op)
+                    log(i, None)
+                except OSError as e:
+                    log(i, e)
+
+            if copies:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    futures = {pool.submit(self._apply, op, True): i for i, op in copies}
+                    for future in as_completed(futures):
+                        log(futures[future], future.exception())
+            os.fsync(journal.fileno())
+
+        return [(op, errors[i]) for i, op in indexed_ops]
+
+    # --- Recovery ---
+
+    @staticmethod
+    def read_journal(journal_path):
+        """
+        Returns (header, ops, states) with states mapping op index -> 'done', 'failed', 'undone'
+        or 'undo_failed' (the op is still done, only reverting it failed).
+        """
+        header, ops, states = {}, {}, {}
+        with open(journal_path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if 'label' in entry:
+                    header = entry
+                elif 'plan' in entry:
+                    ops[entry['plan']] = entry['op']
+                else:
+                    for state in ('done', 'failed', 'undone', 'undo_failed'):
+                        if state in entry:
+                            states[entry[state]] = state
+        return header, [ops[i] for i in sorted(ops)], states
+
+    def list_journals(self):
+        """Returns a summary dict per journal, newest first."""
+        if not os.path.isdir(self.journal_dir):
+            return []
+        summaries = []
+        for name in sorted(os.listdir(self.journal_dir), reverse=True):
+            if not name.endswith('.jsonl'):
+                continue
+            path = os.path.join(self.journal_dir, name)
+            header, ops, states = self.read_journal(path)
+            done = sum(1 for s in states.values() if s in ('done', 'undo_failed'))
+            summaries.append({
+                'path': path,
+                'label': header.get('label', name),
+                'created': header.get('created', ''),
+                'total': len(ops),
+                'done': done,
+                'undone': sum(1 for s in states.values() if s == 'undone'),
+                'pending': len(ops) - len(states) + sum(1 for s in states.values() if s == 'failed')
+            })
+        return summaries
+
+    def resume(self, journal_path):
+        """Runs the operations of an interrupted batch that did not complete."""
+        _, ops, states = self.read_journal(journal_path)
+        pending = [(i, op) for i, op in enumerate(ops) if states.get(i) in (None, 'failed')]
+        return self._run(journal_path, pending)
+
+    def undo(self, journal_path):
+        """
+        Reverts the completed operations of a batch, newest first.
+        Moves and renames are moved back, links become independent copies again.
+        Deleted files cannot be restored and are reported as errors.
+        Ops whose undo failed before are tried again; they never count as pending for resume().
+        """
+        _, ops, states = self.read_journal(journal_path)
+        inverse, deleted = [], []
+        for i, op in reversed(list(enumerate(ops))):
+            if states.get(i) not in ('done', 'undo_failed'):
+                continue
+            if op['type'] in ('move', 'rename'):
+                inverse.append((i, {'type': op['type'], 'src': op['dst'], 'dst': op['src']}))
+            elif op['type'] == 'link':
+                inverse.append((i, {'type': 'unlink', 'src': op['src']}))
+            else:
+                deleted.append(op)
+
+        results = self._run(journal_path, inverse, state='undone', failed_state='undo_failed')
+        results += [(op, FileNotFoundError(f"Deleted files cannot be restored: {op['src']}")) for op in deleted]
+        return results
@@ -0,0 +1,123 @@
+from collections import defaultdict
+
+# Compact chroma fingerprint: a short window of the track is decoded, the spectrum
+# is folded into the 12 pitch classes and averaged over SEGMENTS time slices.
+# Each (slice, pitch class) gives one bit: is that pitch class above the slice average?
+# Lossy/lossless encodes of the same recording give (nearly) the same bits.
+
+WINDOW_OFFSET = 30.0  # seconds into the track (skips silent intros)
+WINDOW_LENGTH = 20.0
+SEGMENTS = 32
+FINGERPRINT_BITS = SEGMENTS * 12
+
+# LSH: the bits are split into bands; two tracks become candidates if any band matches exactly.
+BANDS = 16
+BAND_BITS = FINGERPRINT_BITS // BANDS
+
+FINGERPRINT_EXTENSIONS = ('.mp3', '.flac', '.wav', '.aiff')  # formats libsndfile decodes
+
+def compute_fingerprint(file_path):
+    """
+    Returns (duration_seconds, fingerprint_int) or None if the file can't be decoded
+    or the window carries no usable signal (silence, too short).
+    Module level so it can run in a process pool.
+    """
+    import numpy as np
+    import soundfile as sf
+
+    try:
+        with sf.SoundFile(file_path) as f:
+            sr = f.samplerate
+            duration = f.frames / sr
+            if duration >= WINDOW_OFFSET + WINDOW_LENGTH:
+                start = WINDOW_OFFSET
+            else:
+                start = max(0.0, (duration - WINDOW_LENGTH) / 2)
+            f.seek(int(start * sr))
+            data = f.read(int(WINDOW_LENGTH * sr), dtype='float32', always_2d=True)
+    except (RuntimeError, OSError, sf.LibsndfileError):
+        return None
+
+    mono = data.mean(axis=1)
+    # ~100 ms frames regardless of sample rate
+    n_fft = 1 << int(round(np.log2(sr * 0.1)))
+    hop = n_fft // 2
+    if len(mono) < n_fft * 4:
+        return None
+
+    frames = np.lib.stride_tricks.sliding_window_view(mono, n_fft)[::hop]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1)) ** 2
+
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    band = (freqs >= 55) & (freqs <= 4000)
+    pitch_class = np.round(12 * np.log2(freqs[band] / 440.0)).astype(int) % 12
+    fold = np.zeros((band.sum(), 12), dtype=np.float32)
+    fold[np.arange(band.sum()), pitch_class] = 1.0
+    chroma = spectrum[:, band] @ fold
+
+    # Average frames into time slices
+    slice_index = np.minimum(np.arange(len(chroma)) * SEGMENTS // len(chroma), SEGMENTS - 1)
+    slices = np.zeros((SEGMENTS, 12), dtype=np.float64)
+    np.add.at(slices, slice_index, chroma)
+
+    bits = slices > slices.mean(axis=1, keepdims=True)
+    if slices.sum() <= 1e-9 or not 0.1 < bits.mean() < 0.9:
+        return None
+    return duration, int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+class FingerprintIndex:
+    """Locality-sensitive hash index over fingerprints (banded bit sampling)."""
+    def __init__(self, max_distance=int(FINGERPRINT_BITS * 0.15), max_duration_diff=2.0, max_bucket=200):
+        self.max_distance = max_distance
+        self.max_duration_diff = max_duration_diff
+        # Buckets larger than this hold generic patterns (e.g. drones), not duplicates
+        self.max_bucket = max_bucket
+        self.items = []  # (key, duration, fingerprint)
+        self.buckets = defaultdict(list)
+
+    def add(self, key, duration, fingerprint):
+        index = len(self.items)
+        self.items.append((key, duration, fingerprint))
+        mask = (1 << BAND_BITS) - 1
+        for band in range(BANDS):
+            self.buckets[(band, (fingerprint >> (band * BAND_BITS)) & mask)].append(index)
+
+    def pairs(self):
+        """Yields (key_a, key_b) of verified near-duplicate pairs."""
+        checked = set()
+        for members in self.buckets.values():
+            if len(members) < 2 or len(members) > self.max_bucket:
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if (a, b) in checked:
+                        continue
+                    checked.add((a, b))
+                    key_a, duration_a, fp_a = self.items[a]
+                    key_b, duration_b, fp_b = self.items[b]
+                    if abs(duration_a - duration_b) > self.max_duration_diff:
+                        continue  # e.g. Radio Edit vs. Extended Mix
+                    if hamming(fp_a, fp_b) <= self.max_distance:
+                        yield key_a, key_b
+
+    def groups(self):
+        """Returns lists of keys that belong together (connected near-duplicate pairs)."""
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b in self.pairs():
+            parent[find(a)] = find(b)
+
+        groups = defaultdict(list)
+        for key in parent:
+            groups[find(key)].append(key)
+        return list(groups.values())
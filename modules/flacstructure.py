@@ -0,0 +1,162 @@
+import os
+import random
+from modules.audioformats import read_flac_streaminfo, audio_payload_span
+
+# Structural FLAC check that reads a few KB per file instead of decoding it:
+# STREAMINFO vs. file size, a valid frame at the start of the audio, frame sync at a
+# few random offsets and a complete last frame (CRC-16) that ends at the last sample.
+# Frame headers are only trusted if their CRC-8 matches, so payload bytes that happen
+# to look like a sync code are skipped.
+
+def _crc_table(poly, bits):
+    top, mask = 1 << (bits - 1), (1 << bits) - 1
+    table = []
+    for byte in range(256):
+        crc = byte << (bits - 8)
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & mask if crc & top else (crc << 1) & mask
+        table.append(crc)
+    return table
+
+CRC8_TABLE = _crc_table(0x07, 8)
+CRC16_TABLE = _crc_table(0x8005, 16)
+
+def crc8(data):
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+def crc16(data, crc=0):
+    """CRC-16 with polynomial 0x8005 (FLAC frames start at 0, MP3 frames at 0xFFFF)."""
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+BLOCK_SIZES = {1: 192, 2: 576, 3: 1152, 4: 2304, 5: 4608, **{code: 256 << (code - 8) for code in range(8, 16)}}
+SAMPLE_SIZES = {1: 8, 2: 12, 4: 16, 5: 20, 6: 24, 7: 32}  # 0 = from STREAMINFO
+DEFAULT_WINDOW = 64 * 1024  # bytes read per probe when STREAMINFO has no max frame size
+
+def parse_frame_header(data, pos, info):
+    """
+    Returns (first_sample, block_size) if a valid frame header (matching STREAMINFO) starts
+    at data[pos], otherwise None.
+    """
+    if pos + 6 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xFE != 0xF8:
+        return None
+    variable = data[pos + 1] & 0x01
+    block_code, rate_code = data[pos + 2] >> 4, data[pos + 2] & 0x0F
+    channel_code, size_code = data[pos + 3] >> 4, (data[pos + 3] >> 1) & 0x07
+    if block_code == 0 or rate_code == 15 or channel_code > 10 or size_code == 3 or data[pos + 3] & 0x01:
+        return None
+    if (channel_code + 1 if channel_code < 8 else 2) != info['channels']:
+        return None
+    if size_code and SAMPLE_SIZES[size_code] != info['bits_per_sample']:
+        return None
+
+    # Frame number (fixed block size) or sample number (variable), UTF-8 style coded
+    i = pos + 4
+    first = data[i]
+    ones = 8 - (first ^ 0xFF).bit_length()  # leading 1 bits
+    if ones == 1 or ones > 7:
+        return None
+    extra = max(ones - 1, 0)
+    number = first & (0x7F >> ones)
+    if i + 1 + extra > len(data):
+        return None
+    for byte in data[i + 1:i + 1 + extra]:
+        if byte & 0xC0 != 0x80:
+            return None
+        number = (number << 6) | (byte & 0x3F)
+    i += 1 + extra
+    if i + 3 >= len(data):  # room for block size, sample rate and CRC-8
+        return None
+
+    if block_code == 6:
+        block_size, i = data[i] + 1, i + 1
+    elif block_code == 7:
+        block_size, i = int.from_bytes(data[i:i + 2], 'big') + 1, i + 2
+    else:
+        block_size = BLOCK_SIZES[block_code]
+    i += {12: 1, 13: 2, 14: 2}.get(rate_code, 0)
+    if i >= len(data) or crc8(data[pos:i]) != data[i]:
+        return None
+    first_sample = number if variable else number * info['max_blocksize']
+    return first_sample, block_size
+
+def _find_frame(data, info, start=0):
+    """Returns (pos, first_sample, block_size) of the first valid frame header at or after start."""
+    pos = data.find(b'\xff', start)
+    while pos != -1:
+        header = parse_frame_header(data, pos, info)
+        if header:
+            return (pos, *header)
+        pos = data.find(b'\xff', pos + 1)
+    return None
+
+def _check_last_frame(data, info, max_attempts=4):
+    """data ends where the audio ends. Returns None if it ends with a complete frame at the last sample."""
+    attempts = 0
+    pos = len(data)
+    while attempts < max_attempts:
+        pos = data.rfind(b'\xff', 0, pos)
+        if pos == -1:
+            break
+        header = parse_frame_header(data, pos, info)
+        if header is None:
+            continue
+        attempts += 1
+        # The CRC-16 over a frame including its own CRC footer is 0
+        if crc16(data[pos:]) == 0:
+            first_sample, block_size = header
+            end_sample = first_sample + block_size
+            if info['total_samples'] and end_sample != info['total_samples']:
+                return f"Last frame ends at sample {end_sample} of {info['total_samples']}"
+            return None
+    return "Last frame incomplete, truncated download?"
+
+def check_flac_structure(file_path, probes=3, rng=random):
+    """
+    Returns None if the FLAC structure looks intact, otherwise a short reason.
+    Reads STREAMINFO, the first and last frame and a window at `probes` random offsets
+    (different ones every run, so repeated checks cover more of the file).
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        info = read_flac_streaminfo(f)
+        if info is None:
+            return "No FLAC header"
+        start, length = audio_payload_span(file_path, size)
+        end = start + length
+        if length <= 0:
+            return "No audio data"
+        # Any stretch of max_framesize bytes contains the start of a frame
+        window = (info['max_framesize'] or DEFAULT_WINDOW) + 16
+
+        # STREAMINFO vs. file size: every frame is at least min_framesize bytes
+        if info['total_samples'] and info['max_blocksize'] and info['min_framesize']:
+            min_frames = -(-info['total_samples'] // info['max_blocksize'])
+            if length < min_frames * info['min_framesize']:
+                return (f"Truncated: {length // 1024} KB of audio, STREAMINFO needs at least "
+                        f"{min_frames * info['min_framesize'] // 1024} KB")
+
+        f.seek(start)
+        head = f.read(min(window, length))
+        frame = _find_frame(head, info)
+        if frame is None or frame[0] != 0 or frame[1] != 0:
+            return "No valid frame at the start of the audio data"
+
+        for _ in range(probes):
+            if length <= window * 2:
+                break
+            offset = rng.randrange(start + window, end - window)
+            f.seek(offset)
+            frame = _find_frame(f.read(window), info)
+            if frame is None:
+                return f"No frame sync near byte {offset}, damaged data"
+            if info['total_samples'] and frame[1] >= info['total_samples']:
+                return f"Frame at byte {offset + frame[0]} starts after the last sample"
+
+        tail_start = max(start, end - window)
+        f.seek(tail_start)
+        return _check_last_frame(f.read(end - tail_start), info)
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+
+class HashCache:
+    """
+    On-disk cache of file hashes, stored as SQLite database in the library root.
+    Rows are keyed by path and only trusted while size, mtime and inode still match,
+    so modified or replaced files are rehashed automatically.
+    """
+    FILENAME = ".dj_hashcache.sqlite"
+    # Writes are committed in batches, so an interrupted first scan keeps most of its work
+    COMMIT_EVERY = 500
+
+    def __init__(self, root_path):
+        self.db_path = os.path.join(root_path, self.FILENAME)
+        self.conn = None
+        self.uncommitted = 0
+        try:
+            self.conn = sqlite3.connect(self.db_path)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    path TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    PRIMARY KEY (path, kind)
+                )
+            """)
+        except sqlite3.Error:
+            # Read-only volume or broken DB file: run without cache
+            self.conn = None
+
+    def get(self, path, kind, stat):
+        """Returns the cached digest or None if missing/stale. Stale rows are dropped."""
+        if self.conn is None:
+            return None
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, inode, digest FROM hashes WHERE path = ? AND kind = ?",
+            (path, kind)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[:3] != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            self.conn.execute("DELETE FROM hashes WHERE path = ? AND kind = ?", (path, kind))
+            return None
+        return row[3]
+
+    def put(self, path, kind, stat, digest):
+        if self.conn is None:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO hashes (path, kind, size, mtime_ns, inode, digest) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, kind, stat.st_size, stat.st_mtime_ns, stat.st_ino, digest)
+        )
+        self.uncommitted += 1
+        if self.uncommitted >= self.COMMIT_EVERY:
+            try:
+                self.conn.commit()
+            except sqlite3.Error:
+                pass  # e.g. locked by another scan: retried with the next batch
+            self.uncommitted = 0
+
+    def prune(self, seen_paths, kinds=None):
+        """Drops rows of files that no longer exist in the library (only rows of these kinds, if given)."""
+        if self.conn is None:
+            return
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM seen")
+        self.conn.executemany("INSERT OR IGNORE INTO seen (path) VALUES (?)", ((p,) for p in seen_paths))
+        query = "DELETE FROM hashes WHERE path NOT IN (SELECT path FROM seen)"
+        if kinds is None:
+            self.conn.execute(query)
+        else:
+            self.conn.execute(f"{query} AND kind IN ({', '.join('?' * len(kinds))})", tuple(kinds))
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.conn.commit()
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+        self.conn = None
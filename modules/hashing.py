@@ -0,0 +1,128 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+READ_BLOCK = 1024 * 1024
+
+ALGORITHMS = {
+    'blake2b': lambda: hashlib.blake2b(digest_size=32),
+    'sha256': hashlib.sha256,
+}
+if xxhash is not None:
+    # Non-cryptographic, several GB/s. Only offered if the package is installed.
+    ALGORITHMS['xxh3'] = xxhash.xxh3_128
+
+# Dedup only needs protection against accidental collisions, so a fast
+# non-cryptographic hash is preferred. SHA-256 is the fallback because most
+# current CPUs hash it in hardware (see benchmarks/hash_throughput.py).
+DEFAULT_ALGORITHM = 'xxh3' if xxhash is not None else 'sha256'
+
+_local = threading.local()
+
+def available_algorithms():
+    return list(ALGORITHMS)
+
+def get_buffer():
+    """Returns a READ_BLOCK sized buffer that is reused for every file read by this thread."""
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray(READ_BLOCK)
+    return buffer
+
+def _advise_sequential(f):
+    """Tells the kernel (Linux) to read ahead aggressively."""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+def _update_from(hasher, f, length=None):
+    """Feeds up to length bytes (or everything) from f into hasher, without allocating per block."""
+    buffer = get_buffer()
+    view = memoryview(buffer)
+    while length is None or length > 0:
+        n = f.readinto(buffer if length is None or length >= len(buffer) else view[:length])
+        if not n:
+            break
+        hasher.update(view[:n])
+        if length is not None:
+            length -= n
+    view.release()
+
+# Hash functions live on module level so they can be sent to a process pool.
+
+def hash_file(file_path, algorithm=DEFAULT_ALGORITHM, start=0, length=None):
+    """Calculates the hash of a file's content (or of length bytes from start)."""
+    hasher = ALGORITHMS[algorithm]()
+    with open(file_path, 'rb', buffering=0) as f:
+        _advise_sequential(f)
+        if start:
+            f.seek(start)
+        _update_from(hasher, f, length)
+    return hasher.hexdigest()
+
+def hash_partial(file_path, size, block_size=65536, algorithm=DEFAULT_ALGORITHM, start=0):
+    """Calculates the hash of the first and last block_size bytes of a file (or of size bytes from start)."""
+    hasher = ALGORITHMS[algorithm]()
+    with open(file_path, 'rb', buffering=0) as f:
+        f.seek(start)
+        _update_from(hasher, f, min(block_size, size))
+        f.seek(start + max(size - block_size, 0))
+        _update_from(hasher, f, min(block_size, size))
+    return hasher.hexdigest()
+
+
+class HashEngine:
+    """
+    Runs hash jobs on a bounded thread or process pool.
+    With a single worker the jobs run inline, exactly like a serial loop.
+    """
+    def __init__(self, workers=1, use_processes=False, max_pending=None):
+        self.workers = max(1, workers or 1)
+        self.use_processes = use_processes
+        # Bounded queue: the job source is only consumed while fewer than max_pending jobs are in flight
+        self.max_pending = max_pending or self.workers * 4
+
+    def imap(self, jobs):
+        """
+        Runs (key, fn, args) jobs and yields (key, result, error) in completion order.
+        jobs may be a lazy generator (e.g. a directory walk); memory stays bounded by max_pending.
+        error is the OSError raised by the job, result is None in that case.
+        """
+        if self.workers == 1:
+            for key, fn, args in jobs:
+                try:
+                    yield key, fn(*args), None
+                except OSError as e:
+                    yield key, None, e
+            return
+
+        executor_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        with executor_cls(max_workers=self.workers) as executor:
+            pending = {}
+            for key, fn, args in jobs:
+                pending[executor.submit(fn, *args)] = key
+                if len(pending) >= self.max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._result(pending.pop(future), future)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield self._result(pending.pop(future), future)
+
+    @staticmethod
+    def _result(key, future):
+        error = future.exception()
+        if error is None:
+            return key, future.result(), None
+        if isinstance(error, OSError):
+            return key, None, error
+        raise error
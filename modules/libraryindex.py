@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import uuid
+from modules.walker import IGNORED_FOLDERS, AUDIO_EXTENSIONS
+
+class LibraryIndex:
+    """
+    Persistent list of the audio files in a library, stored as JSON in the library root.
+    Every folder is stored with its mtime; adding, removing or renaming an entry changes
+    the mtime of its folder, so on refresh only folders with a new mtime are listed again.
+    Follows the walker rules (dotfiles, symlinked folders and IGNORED_FOLDERS are skipped)
+    and keeps os.walk order.
+    """
+    FILENAME = ".dj_library_index.json"
+    FORMAT = 1
+    # Folders changed this shortly before they were listed may change again within the
+    # same mtime tick (FAT has 2 s resolution), so they are listed again next time.
+    RACY_SECONDS = 2.0
+
+    def __init__(self, root_path, extensions=AUDIO_EXTENSIONS):
+        self.root_path = root_path
+        self.extensions = extensions
+        self.index_path = os.path.join(root_path, self.FILENAME)
+        self.dirs = {}  # folder path relative to the root -> {'mtime_ns', 'files': [names], 'subdirs': [names]}
+        self.version = None  # changes whenever the file list changes
+        self.listed = 0  # folders listed during the last refresh
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('format') == self.FORMAT and data.get('extensions') == list(self.extensions):
+            self.dirs = data.get('dirs', {})
+            self.version = data.get('version')
+
+    def _save(self):
+        data = {'format': self.FORMAT, 'extensions': list(self.extensions), 'version': self.version, 'dirs': self.dirs}
+        tmp_path = f"{self.index_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # Read-only volume: the index just isn't persisted
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _list(self, directory, mtime_ns):
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            entries = []
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    if name not in IGNORED_FOLDERS and not entry.is_symlink():
+                        subdirs.append(name)
+                elif name.lower().endswith(self.extensions):
+                    files.append(name)
+            except OSError:
+                continue
+        if time.time() - mtime_ns / 1e9 < self.RACY_SECONDS:
+            mtime_ns = None
+        return {'mtime_ns': mtime_ns, 'files': files, 'subdirs': subdirs}
+
+    def refresh(self, rebuild=False, progress=None, task=None):
+        """
+        Brings the index up to date and returns the file paths in os.walk order.
+        rebuild=True lists every folder again instead of trusting the stored mtimes.
+        progress/task: optional rich progress task, advanced per file.
+        """
+        old_dirs = {} if rebuild else self.dirs
+        new_dirs = {}
+        paths = []
+        changed = rebuild or self.version is None
+        touched = False  # folders listed again without any change to the file list
+        self.listed = 0
+
+        # Folders are keyed relative to the root, so the index works however the root is spelled
+        stack = ['']
+        while stack:
+            relative = stack.pop()
+            directory = os.path.join(self.root_path, relative) if relative else self.root_path
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            entry = old_dirs.get(relative)
+            if entry is None or entry['mtime_ns'] != mtime_ns:
+                listed = self._list(directory, mtime_ns)
+                self.listed += 1
+                if entry is None or (listed['files'], listed['subdirs']) != (entry['files'], entry['subdirs']):
+                    changed = True
+                elif relative:
+                    # Saving the index itself touches the root folder, so that one doesn't count
+                    touched = True
+                entry = listed
+            new_dirs[relative] = entry
+
+            for name in entry['files']:
+                paths.append(os.path.join(directory, name))
+            if progress is not None:
+                progress.update(task, total=len(paths), completed=len(paths))
+            # Depth-first, subfolders in listing order (like os.walk)
+            stack.extend(os.path.join(relative, name) if relative else name for name in reversed(entry['subdirs']))
+
+        if new_dirs.keys() != old_dirs.keys():
+            changed = True
+        if changed:
+            self.version = uuid.uuid4().hex[:12]
+        if changed or touched:
+            self.dirs = new_dirs
+            self._save()
+        return paths
@@ -1,141 +1,548 @@
 import os
-import pandas as pd
-from thefuzz import process, fuzz
+import csv
+import json
+import uuid
+import hashlib
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+import numpy as np
+from thefuzz import utils
+from rapidfuzz import process as rprocess, fuzz as rfuzz
 from rich.progress import Progress
+from modules.libraryindex import LibraryIndex
+from modules.tagindex import TagIndex
+from modules.playlistcsv import read_playlist, write_rows
 
 class MatchMaker:
-    def __init__(self, dry_run=False):
+    # Candidate blocking: library keys are indexed by the first BLOCK_PREFIX characters of each token
+    BLOCK_PREFIX = 3
+    # Batch scoring: a chunk of CSV rows is scored against the union of their candidates;
+    # chunks are cut so rows x candidates stays below this many cells (8 bytes each)
+    MAX_CHUNK_CELLS = 1 << 22
+    # ... and at most this many times the cells actually needed by the rows' own candidates
+    MAX_CHUNK_PADDING = 2
+    # Library keys: built from filenames, from artist/title/mix tags, or both
+    KEY_MODES = ('filename', 'tags', 'both')
+    # Match results per playlist, in the library root
+    RESULT_CACHE_DIR = ".dj_match_cache"
+    RESULT_CACHE_FORMAT = 1
+    # One file per CSV version; only the most recently used ones are kept
+    RESULT_CACHE_LIMIT = 200
+
+    def __init__(self, dry_run=False, exhaustive=False, workers=-1, rebuild_index=False, key_mode='filename',
+                 duration_tolerance=None):
+        if key_mode not in self.KEY_MODES:
+            raise ValueError(f"Unknown key mode: {key_mode}")
         self.dry_run = dry_run
+        self.key_mode = key_mode
+        # Seconds a file may differ from the CSV's "Track Duration (ms)" (None = durations not used).
+        # Needs the tags, so they are read in every key mode when set.
+        self.duration_tolerance = duration_tolerance
+        # rebuild_index=True lists every library folder again instead of trusting the saved index
+        self.rebuild_index = rebuild_index
+        self.library_index = None
+        self.index_version = None # changes whenever the search index would give other results
+        self._search_lock = threading.Lock() # playlists can be matched concurrently
+        # exhaustive=True scores every query against the whole library (slow, for comparison). It can
+        # find more rows, matched only through common words, so results differ from the blocked search.
+        self.exhaustive = exhaustive
+        # Threads for the score matrix (-1 = all cores)
+        self.workers = workers
         self.local_files = []
         self.local_index = {} # simplified string -> path
+        self.local_tags = {} # path -> tags (read for key_mode 'tags'/'both', duration_tolerance or CSVs with ISRCs)
+        self.isrc_index = {} # ISRC tag -> path
+        self.exact_index = {} # whitespace-normalized processed key -> positions in local_keys
+        self.key_durations = np.empty(0) # seconds per position in local_keys (NaN = unknown)
+        self.duration_order = np.empty(0, dtype=np.int64) # positions with known duration, sorted by it
+        self.sorted_durations = np.empty(0)
+        self.unknown_durations = np.empty(0, dtype=np.int64) # positions without duration (never pruned)
+        self.local_entries = [] # (key, path) per file and key, duplicates included
+        self.local_keys = []
+        self.local_paths = [] # path per position in local_keys
+        self.processed_keys = [] # local_keys as the scorer sees them
+        self.block_index = defaultdict(list) # token prefix -> positions in local_keys
+        self.common_blocks = set()
+        self.common_only = [] # positions of keys made only of common token prefixes
 
-    def _index_files(self, root_path):
-        """Indexes all audio files in the directory for faster matching."""
-        self.local_files = []
-        self.local_index = {}
+    @staticmethod
+    def _process(text):
+        """Normalizes text like thefuzz does before token_set_ratio."""
+        return utils.full_process(text, force_ascii=True)
+
+    def _block_keys(self, processed):
+        """Token prefixes of an already processed string."""
+        return {token[:self.BLOCK_PREFIX] for token in processed.split()}
+
+    def _build_block_index(self):
+        if self.duration_tolerance is None:
+            entries = list(self.local_index.items()) # one per key, as before
+        else:
+            # Same-named files (e.g. two edits in different folders) stay apart for the duration check
+            entries = self.local_entries
+        self.local_keys = [key for key, _ in entries]
+        self.local_paths = [path for _, path in entries]
+        self.processed_keys = [self._process(key) for key in self.local_keys]
+        self.block_index = defaultdict(list)
+        self.exact_index = {}
+        key_blocks = []
+        for position, key in enumerate(self.processed_keys):
+            self.exact_index.setdefault(' '.join(key.split()), []).append(position)
+            blocks = self._block_keys(key)
+            key_blocks.append(blocks)
+            for block in blocks:
+                self.block_index[block].append(position)
+        
+        # Prefixes shared by a large part of the library (e.g. 'fea' for feat., 'mix')
+        # don't narrow anything down.
+        limit = max(500, len(self.local_keys) // 20)
+        self.common_blocks = {b for b, positions in self.block_index.items() if len(positions) > limit}
+        # token_set_ratio scores 100 if all tokens of a key appear in the query, so keys made
+        # only of common prefixes have to stay candidates for every query.
+        self.common_only = [p for p, blocks in enumerate(key_blocks) if blocks <= self.common_blocks]
+
+    def _build_duration_index(self):
+        durations = []
+        for path in self.local_paths:
+            tags = self.local_tags.get(path) or {}
+            durations.append(tags.get('duration') or np.nan)
+        self.key_durations = np.array(durations, dtype=np.float64)
+        known = ~np.isnan(self.key_durations)
+        self.duration_order = np.flatnonzero(known)
+        self.duration_order = self.duration_order[np.argsort(self.key_durations[known], kind='stable')]
+        self.sorted_durations = self.key_durations[self.duration_order]
+        self.unknown_durations = np.flatnonzero(~known)
+
+    def _duration_window(self, duration):
+        """Positions (sorted) of the keys within duration_tolerance of duration, plus those of unknown duration."""
+        lo = np.searchsorted(self.sorted_durations, duration - self.duration_tolerance, side='left')
+        hi = np.searchsorted(self.sorted_durations, duration + self.duration_tolerance, side='right')
+        return np.union1d(self.duration_order[lo:hi], self.unknown_durations)
+
+    def _candidates(self, processed, duration=None):
+        """
+        Returns the positions of the library keys sharing a selective token prefix with
+        the processed query, in library order (ties among candidates resolve like the exhaustive search).
+        Keys that share only common prefixes (e.g. 'nig' of "night") with a query that has selective
+        ones are never scored. Those are the rows where the exhaustive search finds a different (mostly
+        wrong) file, so the blocked search is an approximation of it, not an exact replacement.
+        With a duration, keys outside the tolerance window are dropped before any scoring.
+        """
+        if self.exhaustive:
+            positions = range(len(self.local_keys))
+        else:
+            blocks = [b for b in self._block_keys(processed) if b in self.block_index]
+            selective = [b for b in blocks if b not in self.common_blocks]
+            positions = set(self.common_only)
+            for block in selective or blocks:
+                positions.update(self.block_index[block])
+            positions = sorted(positions)
+        if duration is not None:
+            positions = np.intersect1d(self._duration_window(duration), positions, assume_unique=True).tolist()
+        return positions
+
+    def _duration_penalty(self, positions, duration):
+        """Distance of each key's duration from duration (inf if either is unknown)."""
+        if duration is None:
+            return np.full(len(positions), np.inf)
+        return np.nan_to_num(np.abs(self.key_durations[positions] - duration), nan=np.inf)
+
+    def _chunks(self, processed_queries, durations):
+        """
+        processed_queries: {query index: processed query}, durations: {query index: seconds or None}
+        Yields (rows, columns): rows are (query index, candidate positions), columns their union.
+        Rows are ordered by their most selective token prefix, so rows of the same artist/title
+        share most of their candidates and the score matrix isn't mostly padding.
+        Candidates are only looked up for the chunk being built, so memory doesn't grow with the CSV.
+        """
+        def rarest_block(i):
+            blocks = [b for b in self._block_keys(processed_queries[i]) if b in self.block_index]
+            return min(blocks, key=lambda b: (len(self.block_index[b]), b), default='')
         
-        allowed_exts = ('.mp3', '.flac', '.wav', '.aiff', '.m4a')
+        rows, columns, cells = [], set(), 0
+        for i in sorted(processed_queries, key=rarest_block):
+            candidates = self._candidates(processed_queries[i], durations[i])
+            merged = columns.union(candidates)
+            size = (len(rows) + 1) * len(merged)
+            if rows and (size > self.MAX_CHUNK_CELLS or size > self.MAX_CHUNK_PADDING * (cells + len(candidates))):
+                yield rows, columns
+                rows, merged, cells = [], set(candidates), 0
+            rows.append((i, candidates))
+            columns = merged
+            cells += len(candidates)
+        if rows:
+            yield rows, columns
+
+    def _match_queries(self, queries, description, isrcs=None, durations=None, progress=None):
+        """
+        Returns (path, score, tier) of the best library match per query, or None if there is
+        no candidate. Tiers, cheapest first:
+          'isrc'  - ISRC of the row equals the ISRC tag of a file (needs tags)
+          'exact' - normalized "artist title" equals a library key
+          'fuzzy' - everything else: same result as thefuzz extractOne(query, candidates,
+                    scorer=token_set_ratio) per query, but scored as one matrix per chunk on all cores
+        With duration_tolerance set, the 'exact' and 'fuzzy' tiers only consider keys within the
+        tolerance of the row's duration, and equal scores go to the closest duration.
+        progress: optional shared rich Progress (only one can be live at a time)
+        """
+        with self._search_lock:
+            if self.local_keys is None:
+                self._build_block_index()
+                if self.duration_tolerance is not None:
+                    self._build_duration_index()
+        
+        processed = [self._process(q) for q in queries]
+        if self.duration_tolerance is None or not durations:
+            durations = [None] * len(queries)
+        results = [None] * len(queries)
+        pending = {}
+        
+        for i, query in enumerate(processed):
+            isrc = isrcs[i] if isrcs else None
+            if isrc and isrc in self.isrc_index:
+                results[i] = (self.isrc_index[isrc], 100, 'isrc')
+                continue
+            positions = self.exact_index.get(' '.join(query.split()), [])
+            if durations[i] is not None:
+                penalty = self._duration_penalty(positions, durations[i])
+                positions = [p for p, d in sorted(zip(positions, penalty), key=lambda x: x[1])
+                             if d <= self.duration_tolerance or np.isnan(self.key_durations[p])]
+            if positions:
+                results[i] = (self.local_paths[positions[0]], 100, 'exact')
+                continue
+            pending[i] = query
+        
+        with nullcontext(progress) if progress is not None else Progress() as progress:
+            task = progress.add_task(description, total=len(queries))
+            progress.advance(task, len(queries) - len(pending))
+            
+            for rows, columns in self._chunks(pending, durations):
+                if columns:
+                    columns = sorted(columns)
+                    column_of = {position: c for c, position in enumerate(columns)}
+                    scores = rprocess.cdist(
+                        [processed[i] for i, _ in rows],
+                        [self.processed_keys[p] for p in columns],
+                        scorer=rfuzz.token_set_ratio, dtype=np.float64, workers=self.workers
+                    )
+                    # Only a row's own candidates count (the result must not depend on chunking)
+                    allowed = np.zeros(scores.shape, dtype=bool)
+                    for r, (_, candidates) in enumerate(rows):
+                        allowed[r, [column_of[p] for p in candidates]] = True
+                    scores[~allowed] = -1
+                    best = scores.argmax(axis=1) # first maximum = earliest in library order
+                    
+                    if self.duration_tolerance is not None:
+                        # Equal scores (e.g. "Original Mix" vs. "Radio Edit" filenames) go to the closest duration
+                        for r, (i, _) in enumerate(rows):
+                            if durations[i] is None:
+                                continue
+                            penalty = self._duration_penalty(columns, durations[i])
+                            penalty[scores[r] != scores[r, best[r]]] = np.inf
+                            if np.isfinite(penalty).any():
+                                best[r] = penalty.argmin()
+                    
+                    for r, (i, candidates) in enumerate(rows):
+                        if len(candidates):
+                            score = scores[r, best[r]]
+                            results[i] = (self.local_paths[columns[best[r]]], int(round(score)), 'fuzzy')
+                
+                progress.advance(task, len(rows))
+        
+        return results
+
+    @staticmethod
+    def _tag_key(tags):
+        """Search string "artist title (mix)" from tags, or None if artist or title is missing."""
+        if not tags or not tags.get('artist') or not tags.get('title'):
+            return None
+        key = f"{tags['artist']} {tags['title']}"
+        mix = tags.get('mix')
+        if mix and mix.lower() not in tags['title'].lower():
+            key += f" {mix}"
+        return key.lower().replace('_', ' ').replace('-', ' ')
+
+    def _index_files(self, root_path, read_isrcs=False):
+        """
+        Indexes all audio files in the directory for faster matching (kept if the library is unchanged).
+        read_isrcs: read the tags for the ISRC lookup even if the keys and durations don't need them
+        """
+        if self.library_index is None or self.library_index.root_path != root_path:
+            self.library_index = LibraryIndex(root_path)
+            self.local_files = []
+        previous_version = self.library_index.version if self.local_files else None
+        reads_tags = self.key_mode != 'filename' or self.duration_tolerance is not None or read_isrcs
         
         with Progress() as progress:
             task = progress.add_task("[green]Indexing local library...", total=None)
+            # Only folders changed since the last run are listed again
+            files = self.library_index.refresh(rebuild=self.rebuild_index, progress=progress, task=task)
+            self.rebuild_index = False
+            if not reads_tags and self.library_index.version == previous_version:
+                return
             
-            for root, _, files in os.walk(root_path):
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                    if file.lower().endswith(allowed_exts):
-                        full_path = os.path.join(root, file)
-                        self.local_files.append(full_path)
-                        
-                        # Create a simplified search string: "Artist - Title" based on filename
-                        # This is a heuristic. Ideally we'd read ID3 tags, but filename is faster 
-                        # and often sufficient for DJs who organize files cleanly.
-                        # Let's use the basename without extension as the searchable string.
-                        clean_name = os.path.splitext(file)[0].lower().replace('_', ' ').replace('-', ' ')
-                        self.local_index[clean_name] = full_path
-                        
-            progress.update(task, completed=100, total=100)
+            self.local_files = files
+            self.local_index = {}
+            self.local_entries = []
+            self.local_tags = {}
+            self.index_version = self.library_index.version
             
-    def match(self, csv_path, library_path, threshold=85):
-        """Matches CSV entries to local files."""
-        # 1. Load CSV
-        try:
-            df = pd.read_csv(csv_path)
-        except Exception as e:
-            return {"error": f"Could not read CSV: {e}"}
+            if reads_tags:
+                # Cached by size/mtime, so only new or retagged files are read
+                task = progress.add_task("[green]Reading tags...", total=len(self.local_files))
+                self.local_tags = TagIndex(root_path).read(self.local_files, progress=progress, task=task)
+                # Retagging doesn't change the file list, so the tags are part of the version
+                digest = hashlib.sha256(json.dumps(self.local_tags, sort_keys=True).encode('utf-8')).hexdigest()
+                self.index_version = f"{self.index_version}-{digest[:12]}"
             
-        # Check required columns (adapt to Exportify standard)
-        # Exportify usually has: "Track Name", "Artist Name(s)", "Album Name"
-        required_cols = ['Track Name', 'Artist Name(s)']
-        if not all(col in df.columns for col in required_cols):
-             return {"error": f"CSV missing columns. Required: {required_cols}"}
-
-        # 2. Index Library
-        if not self.local_files:
-            self._index_files(library_path)
+            self.isrc_index = {}
+            for full_path in self.local_files:
+                file = os.path.basename(full_path)
+                isrc = (self.local_tags.get(full_path) or {}).get('isrc')
+                if isrc:
+                    self.isrc_index.setdefault(isrc, full_path)
+                
+                # Create a simplified search string: "Artist - Title" based on filename
+                # This is a heuristic, but fast and often sufficient for DJs who organize
+                # files cleanly. key_mode 'tags'/'both' uses the real artist/title/mix tags.
+                # Let's use the basename without extension as the searchable string.
+                clean_name = os.path.splitext(file)[0].lower().replace('_', ' ').replace('-', ' ')
+                keys = [clean_name] if self.key_mode != 'tags' else []
+                if self.key_mode != 'filename':
+                    # Untagged files keep their filename key
+                    keys.append(self._tag_key(self.local_tags.get(full_path)) or clean_name)
+                for key in keys:
+                    self.local_index[key] = full_path
+                    self.local_entries.append((key, full_path))
+        
+        # The search structures are built on first use (not needed for cached results)
+        self.local_keys = None
             
-        matches = []
-        missing = []
+    @staticmethod
+    def _queries(rows):
+        """Search strings ("artist title") for PlaylistRows."""
+        return [f"{row.artist} {row.track}".lower().replace('-', ' ') for row in rows]
+
+    @staticmethod
+    def _isrcs(rows):
+        """Normalized ISRC per row (None if the CSV has no ISRC column)."""
+        if not rows or rows[0].isrc is None:
+            return None
+        return [row.isrc.replace('-', '').strip().upper() for row in rows]
+
+    def _has_isrcs(self, playlist):
+        """True if a loaded CSV has ISRCs; the tags are read for them in every key mode."""
+        return "error" not in playlist and any(self._isrcs(playlist['rows']) or [])
+
+    @staticmethod
+    def _durations(rows):
+        """Duration in seconds per row (None if the CSV has none or it is 0)."""
+        if not rows or rows[0].duration_ms is None:
+            return None
+        durations = []
+        for row in rows:
+            try:
+                ms = float(row.duration_ms)
+            except ValueError:
+                ms = 0
+            durations.append(ms / 1000 if ms > 0 else None)
+        return durations
+
+    @staticmethod
+    def _tier_hits(best_matches, threshold):
+        """Found rows per lookup tier (shows how much fuzzy scoring was avoided)."""
+        hits = {'isrc': 0, 'exact': 0, 'fuzzy': 0}
+        for best_match in best_matches:
+            if best_match and best_match[1] >= threshold:
+                hits[best_match[2]] += 1
+        return hits
+
+    def _result_cache_path(self, library_path, csv_digest):
+        return os.path.join(library_path, self.RESULT_CACHE_DIR, f"{csv_digest[:20]}.json")
+
+    def _load_result(self, cache_path, cache_key):
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('key') != cache_key:
+            return None
+        try:
+            os.utime(cache_path)  # recently used, see _prune_results
+        except OSError:
+            pass
+        return cached['rows']
+
+    def _save_result(self, cache_path, cache_key, rows):
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': cache_key, 'rows': rows}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Read-only volume: just not cached
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._prune_results(os.path.dirname(cache_path))
+
+    def _prune_results(self, cache_dir):
+        """Keeps the RESULT_CACHE_LIMIT most recently used results (old CSV versions, deleted playlists)."""
+        try:
+            with os.scandir(cache_dir) as it:
+                entries = [(entry.stat().st_mtime, entry.path) for entry in it if entry.name.endswith('.json')]
+        except OSError:
+            return
+        for _, path in sorted(entries, reverse=True)[self.RESULT_CACHE_LIMIT:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already removed by a concurrent playlist
+
+    def match(self, csv_path, library_path, threshold=85):
+        """
+        Matches CSV entries to local files in one pass.
+        Returns found_tracks, missing_tracks, tier_hits and per CSV row {'path', 'score', 'found'};
+        the M3U, missing list and deduped CSV are all written from this one result.
+        The raw matches are cached per CSV content and library index version.
+        """
+        # 1. Load CSV
+        playlist = self._load_csv(csv_path)
+        if "error" in playlist:
+            return playlist
+
+        # 2. Index Library (only changed folders are listed again)
+        self._index_files(library_path, read_isrcs=self._has_isrcs(playlist))
         
-        local_search_keys = list(self.local_index.keys())
+        return self._match_loaded(csv_path, playlist, library_path, threshold)
+
+    def match_playlists(self, csv_paths, library_path, threshold=85, workers=4):
+        """
+        Matches several CSVs against one index of the library. Playlists are matched
+        concurrently (the score matrix releases the GIL). Returns one match() result per CSV.
+        """
+        playlists = [self._load_csv(csv_path) for csv_path in csv_paths]
+        if not all("error" in playlist for playlist in playlists):
+            self._index_files(library_path, read_isrcs=any(self._has_isrcs(playlist) for playlist in playlists))
         
         with Progress() as progress:
-            task = progress.add_task("[magenta]Matching tracks...", total=len(df))
+            def run(csv_path, playlist):
+                if "error" in playlist:
+                    return playlist
+                return self._match_loaded(csv_path, playlist, library_path, threshold, progress)
             
-            for index, row in df.iterrows():
-                track = str(row['Track Name'])
-                artist = str(row['Artist Name(s)'])
-                query = f"{artist} {track}".lower().replace('-', ' ')
-                
-                # Fuzzy match
-                # extractOne returns (best_match_string, score)
-                best_match = process.extractOne(query, local_search_keys, scorer=fuzz.token_set_ratio)
-                
-                if best_match and best_match[1] >= threshold:
-                    matched_path = self.local_index[best_match[0]]
-                    matches.append(matched_path)
-                else:
-                    missing.append(f"{artist} - {track}")
-                    
-                progress.advance(task)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(run, csv_paths, playlists))
+
+    def _load_csv(self, csv_path):
+        """
+        Streams the CSV, keeping only the columns the matcher needs (Exportify standard:
+        "Track Name", "Artist Name(s)", optional "ISRC" and "Track Duration (ms)").
+        Returns {'rows': [PlaylistRow], 'digest': SHA-256 of the file} or {'error': ...}.
+        """
+        try:
+            rows, digest = read_playlist(csv_path)
+        except ValueError as e:
+            return {"error": str(e)}
+        except (OSError, csv.Error) as e:
+            return {"error": f"Could not read CSV: {e}"}
+        return {"rows": rows, "digest": digest}
+
+    def _match_loaded(self, csv_path, playlist, library_path, threshold, progress=None):
+        playlist_rows, csv_digest = playlist['rows'], playlist['digest']
+        
+        # 3. Match all rows at once (ISRC, exact name, then fuzzy), unless this CSV was
+        # already matched against this state of the library with the same options
+        # returns (path, score, tier) per row
+        cache_key = json.dumps([self.RESULT_CACHE_FORMAT, csv_digest, self.index_version,
+                                self.key_mode, self.duration_tolerance, self.exhaustive])
+        cache_path = self._result_cache_path(library_path, csv_digest)
+        best_matches = self._load_result(cache_path, cache_key)
+        if best_matches is None:
+            description = f"[magenta]Matching {os.path.basename(csv_path)}..." if progress else "[magenta]Matching tracks..."
+            best_matches = self._match_queries(self._queries(playlist_rows), description,
+                                               self._isrcs(playlist_rows), self._durations(playlist_rows), progress)
+            self._save_result(cache_path, cache_key, best_matches)
+        
+        matches = []
+        missing = []
+        rows = []
+        for row, best_match in zip(playlist_rows, best_matches):
+            found = bool(best_match and best_match[1] >= threshold)
+            if found:
+                matches.append(best_match[0])
+            else:
+                missing.append(f"{row.artist} - {row.track}")
+            rows.append({
+                "path": best_match[0] if best_match else None,
+                "score": best_match[1] if best_match else 0,
+                "found": found
+            })
                 
         return {
             "found_tracks": matches,
-            "missing_tracks": missing
+            "missing_tracks": missing,
+            "tier_hits": self._tier_hits(best_matches, threshold),
+            "rows": rows,
+            "csv_path": csv_path
         }
 
     def deduplicate_csv(self, csv_path, library_path, threshold=85):
         """Creates a new CSV containing only tracks NOT found in the library."""
-        # 1. Load CSV
-        try:
-            df = pd.read_csv(csv_path)
-        except Exception as e:
-            return {"error": f"Could not read CSV: {e}"}
-            
-        required_cols = ['Track Name', 'Artist Name(s)']
-        if not all(col in df.columns for col in required_cols):
-             return {"error": f"CSV missing columns. Required: {required_cols}"}
+        result = self.match(csv_path, library_path, threshold)
+        if "error" in result:
+            return result
+        return self.export_deduped_csv(result)
 
-        # 2. Index Library
-        if not self.local_files:
-            self._index_files(library_path)
-            
-        local_search_keys = list(self.local_index.keys())
-        rows_to_keep = []
-        
-        with Progress() as progress:
-            task = progress.add_task("[magenta]Deduplicating CSV...", total=len(df))
-            
-            for index, row in df.iterrows():
-                track = str(row['Track Name'])
-                artist = str(row['Artist Name(s)'])
-                query = f"{artist} {track}".lower().replace('-', ' ')
-                
-                # Check if it exists in library
-                best_match = process.extractOne(query, local_search_keys, scorer=fuzz.token_set_ratio)
+    def export_deduped_csv(self, result):
+        """Writes the rows of the matched CSV that were not found to <name>_deduped.csv."""
+        csv_path = result['csv_path']
+        keep = [not row['found'] for row in result['rows']]
+        tier_hits = result['tier_hits']
                 
-                if not (best_match and best_match[1] >= threshold):
-                    # Not found -> Keep it in the new CSV
-                    rows_to_keep.append(row)
-                    
-                progress.advance(task)
-                
-        # 3. Write Deduped CSV
-        if not rows_to_keep:
-            return {"message": "All tracks found in library! No new CSV needed.", "path": None}
-            
-        new_df = pd.DataFrame(rows_to_keep)
+        if not any(keep):
+            return {"message": "All tracks found in library! No new CSV needed.", "path": None, "tier_hits": tier_hits}
         
         base_name = os.path.splitext(os.path.basename(csv_path))[0]
         output_dir = os.path.dirname(os.path.abspath(csv_path))
         output_path = os.path.join(output_dir, f"{base_name}_deduped.csv")
         
         try:
-            new_df.to_csv(output_path, index=False)
-            return {"message": f"Deduped CSV created with {len(new_df)} tracks.", "path": output_path}
+            # Kept rows are copied from the original file byte for byte (all columns, quoting, line endings)
+            written = write_rows(csv_path, output_path, keep)
+            return {"message": f"Deduped CSV created with {written} tracks.", "path": output_path, "tier_hits": tier_hits}
         except Exception as e:
             return {"error": f"Could not write CSV: {e}"}
 
+    def export_missing(self, missing, output_path):
+        """Writes the missing tracks ("Artist - Track" per line) to a text file."""
+        try:
+            # surrogateescape: names from a CSV with invalid UTF-8 are written back unchanged
+            with open(output_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                f.write("\n".join(missing))
+            return f"Missing tracks saved to: {output_path}"
+        except Exception as e:
+            return f"Error writing missing list: {e}"
+
+    @staticmethod
+    def _m3u_content(matches):
+        return "#EXTM3U\n" + "".join(f"{path}\n" for path in matches)
+
+    def m3u_status(self, matches, output_path):
+        """'new' if output_path doesn't exist, 'unchanged' if it already holds these matches, else 'changed'."""
+        try:
+            with open(output_path, encoding='utf-8') as f:
+                existing = f.read()
+        except FileNotFoundError:
+            return 'new'
+        except (OSError, ValueError):
+            return 'changed'
+        return 'unchanged' if existing == self._m3u_content(matches) else 'changed'
+
     def export_m3u(self, matches, output_path):
         """Writes matches to an M3U8 file."""
         if self.dry_run:
@@ -143,9 +550,7 @@ class MatchMaker:
             
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("#EXTM3U\n")
-                for path in matches:
-                    f.write(f"{path}\n")
+                f.write(self._m3u_content(matches))
             return f"Successfully created playlist: {output_path}"
         except Exception as e:
             return f"Error writing M3U: {e}"
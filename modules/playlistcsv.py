@@ -0,0 +1,91 @@
+import csv
+import hashlib
+from collections import namedtuple
+
+# Streaming reader for Exportify-style playlist CSVs.
+# Only the columns the matcher needs are kept per row; the raw text of each record
+# is not kept, so writing a subset back (e.g. _deduped.csv) streams the file again
+# and copies the chosen records byte for byte.
+
+PlaylistRow = namedtuple('PlaylistRow', ['artist', 'track', 'isrc', 'duration_ms'])
+
+COLUMNS = {
+    'artist': 'Artist Name(s)',
+    'track': 'Track Name',
+    'isrc': 'ISRC',
+    'duration_ms': 'Track Duration (ms)',
+}
+REQUIRED_COLUMNS = ['Track Name', 'Artist Name(s)']
+
+class _RecordingLines:
+    """Line iterator for csv.reader that remembers the lines consumed for the current record."""
+    def __init__(self, f):
+        self.f = f
+        self.consumed = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self.f)
+        self.consumed.append(line)
+        return line
+
+    def take(self):
+        raw = ''.join(self.consumed)
+        self.consumed = []
+        return raw
+
+def iter_records(csv_path):
+    """
+    Yields (fields, raw) per CSV record, header first. raw is the exact text of the record,
+    including quoted line breaks and its line ending. Invalid UTF-8 round-trips unchanged.
+    """
+    with open(csv_path, encoding='utf-8', errors='surrogateescape', newline='') as f:
+        lines = _RecordingLines(f)
+        for fields in csv.reader(lines):
+            yield fields, lines.take()
+
+def _encode(raw):
+    return raw.encode('utf-8', errors='surrogateescape')
+
+def read_playlist(csv_path):
+    """
+    Returns (rows, digest): a PlaylistRow per record and the SHA-256 of the file bytes.
+    Missing optional columns give None. Raises ValueError if a required column is missing.
+    """
+    digest = hashlib.sha256()
+    rows = []
+    positions = None
+    for fields, raw in iter_records(csv_path):
+        digest.update(_encode(raw))
+        if positions is None:
+            header = [name.lstrip('\ufeff').strip() for name in fields]
+            missing = [name for name in REQUIRED_COLUMNS if name not in header]
+            if missing:
+                raise ValueError(f"CSV missing columns. Required: {REQUIRED_COLUMNS}")
+            positions = {key: header.index(name) if name in header else None for key, name in COLUMNS.items()}
+            continue
+        if not fields:
+            continue  # blank line
+        rows.append(PlaylistRow(*(
+            (fields[i] if i < len(fields) else '') if i is not None else None
+            for i in positions.values()
+        )))
+    if positions is None:
+        raise ValueError("CSV is empty")
+    return rows, digest.hexdigest()
+
+def write_rows(csv_path, output_path, keep):
+    """Writes the header and the records whose keep flag is set, copied byte for byte. Returns the count."""
+    written = 0
+    with open(output_path, 'wb') as out:
+        index = -1  # header
+        for fields, raw in iter_records(csv_path):
+            if index >= 0 and not fields:
+                continue  # blank lines aren't rows (same as read_playlist)
+            if index < 0 or keep[index]:
+                out.write(_encode(raw))
+                written += index >= 0
+            index += 1
+    return written
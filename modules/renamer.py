@@ -1,27 +1,27 @@
 import os
 import re
 from rich.progress import Progress
+from modules.walker import scan_files
+from modules.fileops import FileOperationExecutor
 
 class RenamerModule:
     def __init__(self, dry_run=False):
         self.dry_run = dry_run
         self.rename_map = {} # old_path -> new_path
+        self.root_path = None
 
     def scan(self, root_path):
         """Scans for files with 'Number - ' prefix."""
         self.rename_map = {}
+        self.root_path = root_path
         # Regex: Start of string, one or more digits, optional whitespace, hyphen, optional whitespace
         pattern = re.compile(r"^\d+\s*-\s*")
         
-        files_to_check = []
-        for root, _, files in os.walk(root_path):
-            for file in files:
-                files_to_check.append((root, file))
-        
         with Progress() as progress:
-            task = progress.add_task("[cyan]Scanning for prefixes...", total=len(files_to_check))
+            task = progress.add_task("[cyan]Scanning for prefixes...", total=None)
             
-            for root, file in files_to_check:
+            for entry in scan_files(root_path, progress=progress, task=task):
+                root, file = os.path.dirname(entry.path), entry.name
                 match = pattern.match(file)
                 if match:
                     # Construct new filename
@@ -42,22 +42,29 @@ class RenamerModule:
         
         return self.rename_map
 
-    def execute(self):
-        """Executes renaming."""
+    def execute(self, library_path=None):
+        """
+        Executes renaming.
+        library_path: library root whose journal records the batch (default: the scanned folder)
+        """
         results = []
+        executor = FileOperationExecutor(library_path or self.root_path)
+        ops = []
         for old_path, new_path in self.rename_map.items():
             if self.dry_run:
                 results.append(f"[DRY-RUN] Rename: '{os.path.basename(old_path)}' -> '{os.path.basename(new_path)}'")
                 continue
             
-            try:
-                if os.path.exists(new_path):
-                     results.append(f"[SKIP] Target exists: {os.path.basename(new_path)}")
-                     continue
-                     
-                os.rename(old_path, new_path)
-                results.append(f"Renamed: {os.path.basename(old_path)} -> {os.path.basename(new_path)}")
-            except Exception as e:
-                results.append(f"[ERROR] Failed to rename {os.path.basename(old_path)}: {e}")
+            op = executor.plan_rename(old_path, new_path)
+            if op is None:
+                results.append(f"[SKIP] Target exists: {os.path.basename(new_path)}")
+                continue
+            ops.append(op)
+            
+        for op, error in executor.execute("rename", ops):
+            if error:
+                results.append(f"[ERROR] Failed to rename {os.path.basename(op['src'])}: {error}")
+            else:
+                results.append(f"Renamed: {os.path.basename(op['src'])} -> {os.path.basename(op['dst'])}")
                 
         return results
@@ -0,0 +1,99 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from modules.hashcache import HashCache
+
+# Tag names per container: ID3 frames (MP3/WAV/AIFF), Vorbis comments (FLAC), MP4 atoms (M4A)
+TAG_KEYS = {
+    'artist': ('TPE1', 'artist', '\xa9ART'),
+    'title': ('TIT2', 'title', '\xa9nam'),
+    'mix': ('TIT3', 'version', 'mixname', 'subtitle', '----:com.apple.iTunes:MIXNAME'),
+    'isrc': ('TSRC', 'isrc', '----:com.apple.iTunes:ISRC'),
+}
+
+def _first_value(tags, keys):
+    for key in keys:
+        try:
+            value = tags.get(key)
+        except (KeyError, ValueError):
+            continue
+        if value is None:
+            continue
+        value = getattr(value, 'text', value)  # ID3 frame
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if isinstance(value, bytes):  # MP4 freeform atom
+            value = value.decode('utf-8', errors='replace')
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return None
+
+def read_tags(file_path):
+    """
+    Returns {'artist', 'title', 'mix', 'isrc', 'duration'} (missing values are None)
+    or None if mutagen can't read the file.
+    """
+    import mutagen
+
+    try:
+        f = mutagen.File(file_path)
+    except (mutagen.MutagenError, OSError, ValueError):
+        return None
+    if f is None:
+        return None
+
+    tags = {name: None for name in TAG_KEYS}
+    if f.tags is not None:
+        for name, keys in TAG_KEYS.items():
+            tags[name] = _first_value(f.tags, keys)
+    if tags['isrc']:
+        tags['isrc'] = tags['isrc'].replace('-', '').upper()
+    length = getattr(getattr(f, 'info', None), 'length', None)
+    tags['duration'] = round(length, 3) if length else None
+    return tags
+
+class TagIndex:
+    """
+    Reads the tags of many files on a thread pool (mostly waiting on the drive).
+    Results are kept in the library's HashCache (kind 'tags') and only trusted while
+    size and mtime match, so later runs only read new or retagged files.
+    """
+    CACHE_KIND = 'tags'
+
+    def __init__(self, root_path, workers=8, use_cache=True):
+        self.root_path = root_path
+        self.workers = workers
+        self.use_cache = use_cache
+
+    def read(self, paths, progress=None, task=None):
+        """Returns {path: tags or None} for paths."""
+        cache = HashCache(self.root_path) if self.use_cache else None
+        results = {}
+        pending = []
+        try:
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    results[path] = None
+                    continue
+                cached = cache.get(path, self.CACHE_KIND, stat) if cache else None
+                if cached is not None:
+                    results[path] = json.loads(cached)
+                    if progress is not None:
+                        progress.advance(task)
+                else:
+                    pending.append((path, stat))
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # map keeps order; cache writes stay on this thread (sqlite connection)
+                for (path, stat), tags in zip(pending, pool.map(read_tags, [p for p, _ in pending])):
+                    results[path] = tags
+                    if cache:  # unreadable files too, so they aren't retried every run
+                        cache.put(path, self.CACHE_KIND, stat, json.dumps(tags))
+                    if progress is not None:
+                        progress.advance(task)
+        finally:
+            if cache:
+                cache.close()
+        return results
@@ -0,0 +1,358 @@
+import os
+import struct
+from modules.audioformats import audio_payload_span, iter_mp4_atoms
+from modules.flacstructure import crc16
+from modules.hashing import get_buffer
+
+# Structural validators for the non-FLAC formats of the Health Check.
+# Each returns None if the file looks intact, otherwise a short reason.
+# MP3 is walked frame by frame through one reused buffer (front to back, once);
+# the chunk/atom based formats only need their headers, so payloads are skipped.
+
+LOOKBACK = 8 * 1024  # bytes kept before the current offset (more than the largest MP3 frame)
+TRAILING_JUNK = 16 * 1024  # unknown data after the last MP3 frame that is still accepted (e.g. Lyrics3 tags)
+
+class _SequentialReader:
+    """
+    Reads the byte range [start, end) of a file front to back through one reused buffer.
+    window(offset, n) returns the buffer index of the n bytes at file offset; offsets may
+    only grow (apart from LOOKBACK bytes). Data that was already passed is never read again.
+    """
+    def __init__(self, f, start, end):
+        self.f = f
+        self.buffer = get_buffer()
+        self.view = memoryview(self.buffer)
+        self.base = start  # file offset of buffer[0]
+        self.filled = 0
+        self.position = start  # file offset of the next read
+        self.end = end
+        f.seek(start)
+
+    def window(self, offset, n):
+        """Returns i so that buffer[i:i + n] holds the bytes at offset, or None past the end."""
+        i = offset - self.base
+        if i < 0:
+            raise ValueError(f"offset {offset} was already passed")
+        if i + n <= self.filled:
+            return i
+        if offset + n > self.end:
+            return None
+        # Keep a little before offset: callers peek at the next frame, then return to this one
+        keep_from = max(offset - LOOKBACK, self.base)
+        if keep_from < self.base + self.filled:
+            j = keep_from - self.base
+            self.buffer[:self.filled - j] = self.buffer[j:self.filled]
+            self.filled -= j
+        else:
+            keep_from = offset
+            self.filled = 0
+            if offset != self.position:
+                self.f.seek(offset)  # skip what lies between (forward only)
+                self.position = offset
+        self.base = keep_from
+        while self.filled < len(self.buffer) and self.position < self.end:
+            count = min(len(self.buffer) - self.filled, self.end - self.position)
+            n_read = self.f.readinto(self.view[self.filled:self.filled + count])
+            if not n_read:
+                self.end = self.position  # file shrank while reading
+                break
+            self.filled += n_read
+            self.position += n_read
+        i = offset - self.base
+        return i if i + n <= self.filled else None
+
+    def find(self, offset, pattern):
+        """File offset of the next occurrence of pattern at or after offset, or None."""
+        while True:
+            i = self.window(offset, len(pattern))
+            if i is None:
+                return None
+            found = self.buffer.find(pattern, i, self.filled)
+            if found != -1:
+                return self.base + found
+            offset = max(offset + 1, self.base + self.filled - len(pattern) + 1)
+
+    def close(self):
+        self.view.release()
+
+# --- MP3 ---
+
+MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MP3_SYNC_SEARCH = 64 * 1024  # junk accepted before the first frame
+
+def parse_mp3_header(data, i):
+    """
+    Returns (frame_length, layer, has_crc, side_info_size) for the MPEG audio frame header at
+    data[i:i + 4], or None. Free-format frames (no bitrate in the header) count as invalid.
+    """
+    if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+        return None
+    version_bits, layer_bits = (data[i + 1] >> 3) & 0x03, (data[i + 1] >> 1) & 0x03
+    bitrate_index, rate_index = data[i + 2] >> 4, (data[i + 2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    layer = 4 - layer_bits
+    mpeg1 = version_bits == 3
+    bitrate = MP3_BITRATES[(1 if mpeg1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+    padding = (data[i + 2] >> 1) & 0x01
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        length = (144 if mpeg1 or layer == 2 else 72) * bitrate // sample_rate + padding
+    mono = data[i + 3] >> 6 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    return length, layer, not data[i + 1] & 0x01, side_info
+
+def _mp3_frame_pair(reader, offset, end):
+    """True if a frame starts at offset and is followed by another frame (or the end of the audio)."""
+    i = reader.window(offset, 4)
+    header = parse_mp3_header(reader.buffer, i) if i is not None else None
+    if header is None:
+        return False
+    following = offset + header[0]
+    if following == end:
+        return True
+    i = reader.window(following, 4)
+    return i is not None and parse_mp3_header(reader.buffer, i) is not None
+
+def _mp3_resync(reader, offset, end, limit=None):
+    """Offset of the next frame pair at or after offset (within limit bytes), or None."""
+    stop = end if limit is None else min(end, offset + limit)
+    while offset < stop:
+        offset = reader.find(offset, b'\xff')
+        if offset is None or offset >= stop:
+            return None
+        if _mp3_frame_pair(reader, offset, end):
+            return offset
+        offset += 1
+    return None
+
+def _vbr_frame_count(data, i, header):
+    """Frame count from a Xing/Info or VBRI header in the first frame, or None."""
+    _, layer, has_crc, side_info = header
+    if layer != 3:
+        return None
+    xing = i + 4 + (2 if has_crc else 0) + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and data[xing + 7] & 0x01:
+        return int.from_bytes(data[xing + 8:xing + 12], 'big')
+    if data[i + 36:i + 40] == b'VBRI':
+        return int.from_bytes(data[i + 50:i + 54], 'big')
+    return None
+
+def validate_mp3(file_path):
+    """Walks every frame: headers must chain, CRCs (if present) match and the last frame be complete."""
+    size = os.path.getsize(file_path)
+    start, length = audio_payload_span(file_path, size)  # without ID3v2/ID3v1/APE tags
+    end = start + length
+    with open(file_path, 'rb', buffering=0) as f:
+        reader = _SequentialReader(f, start, end)
+        try:
+            offset = _mp3_resync(reader, start, end, MP3_SYNC_SEARCH)
+            if offset is None:
+                return "No MPEG audio frames"
+            frames = 0
+            expected_frames = None
+            while offset < end:
+                i = reader.window(offset, 4)
+                header = parse_mp3_header(reader.buffer, i) if i is not None else None
+                if header is None:
+                    if end - offset <= TRAILING_JUNK and _mp3_resync(reader, offset, end) is None:
+                        break  # a few KB of unknown trailing data
+                    return f"Lost frame sync at byte {offset}"
+                frame_length, layer, has_crc, side_info = header
+                if offset + frame_length > end:
+                    return f"Last frame truncated ({end - offset} of {frame_length} bytes)"
+                if frames == 0 or (has_crc and layer == 3):
+                    i = reader.window(offset, min(frame_length, 64))
+                    if frames == 0:
+                        expected_frames = _vbr_frame_count(reader.buffer, i, header)
+                    # The CRC covers the last two header bytes and the side information
+                    if has_crc and layer == 3 and frame_length >= 6 + side_info:
+                        data = reader.buffer[i + 2:i + 4] + reader.buffer[i + 6:i + 6 + side_info]
+                        if crc16(data, 0xFFFF) != int.from_bytes(reader.buffer[i + 4:i + 6], 'big'):
+                            return f"Frame CRC mismatch at byte {offset}"
+                frames += 1
+                offset += frame_length
+        finally:
+            reader.close()
+    # The Xing/VBRI frame itself isn't counted in its header
+    if expected_frames and frames - 1 < expected_frames:
+        return f"Truncated: {frames - 1} of {expected_frames} frames"
+    return None
+
+# --- WAV / AIFF ---
+
+def _iter_chunks(f, start, end, byteorder):
+    """Yields (chunk_id, data_offset, data_size) for the RIFF/IFF chunks between start and end."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        data_size = int.from_bytes(header[4:8], byteorder)
+        yield header[:4], offset + 8, data_size
+        offset += 8 + data_size + (data_size & 1)  # chunks are padded to even sizes
+
+def _chunk_name(chunk_id):
+    return chunk_id.decode('latin-1').strip()
+
+def validate_wav(file_path):
+    """RIFF size vs. file size, every chunk inside the RIFF, fmt + data present and consistent."""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] not in (b'RIFF', b'RF64') or header[8:12] != b'WAVE':
+            return "No RIFF/WAVE header"
+        if header[:4] == b'RF64':
+            return None  # 64-bit sizes live in the ds64 chunk; not checked
+        riff_size = int.from_bytes(header[4:8], 'little')
+        # Streaming writers leave 0 or 0xFFFFFFFF when they can't seek back
+        riff_end = size if riff_size in (0, 0xFFFFFFFF) else 8 + riff_size
+        if riff_end > size:
+            return f"Truncated: RIFF header says {riff_end} bytes, file has {size}"
+
+        block_align = None
+        data_size = None
+        for chunk_id, data_offset, chunk_size in _iter_chunks(f, 12, riff_end, 'little'):
+            if chunk_id == b'data':
+                if chunk_size in (0, 0xFFFFFFFF):
+                    chunk_size = riff_end - data_offset
+                data_size = chunk_size
+            if data_offset + chunk_size > riff_end:
+                return f"Truncated: '{_chunk_name(chunk_id)}' chunk needs {chunk_size} bytes, {riff_end - data_offset} left"
+            if chunk_id == b'fmt ':
+                f.seek(data_offset)
+                fmt = f.read(16)
+                if len(fmt) < 16:
+                    return "Broken fmt chunk"
+                block_align = struct.unpack('<H', fmt[12:14])[0]
+        if block_align is None:
+            return "No fmt chunk"
+        if data_size is None:
+            return "No data chunk"
+        if block_align and data_size % block_align:
+            return f"Data chunk ends inside a sample frame ({data_size} bytes, frames of {block_align})"
+    return None
+
+# AIFF-C compression types that are plain PCM (so the sound data size is known)
+AIFC_PCM = (b'NONE', b'sowt', b'twos', b'raw ', b'in24', b'in32', b'fl32', b'fl64')
+
+def validate_aiff(file_path):
+    """FORM size vs. file size, every chunk inside the FORM, COMM frame count vs. SSND size."""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'FORM' or header[8:12] not in (b'AIFF', b'AIFC'):
+            return "No FORM/AIFF header"
+        form_end = 8 + int.from_bytes(header[4:8], 'big')
+        if form_end > size:
+            return f"Truncated: FORM header says {form_end} bytes, file has {size}"
+
+        expected = None
+        sound_size = None
+        for chunk_id, data_offset, chunk_size in _iter_chunks(f, 12, form_end, 'big'):
+            if data_offset + chunk_size > form_end:
+                return f"Truncated: '{_chunk_name(chunk_id)}' chunk needs {chunk_size} bytes, {form_end - data_offset} left"
+            if chunk_id == b'COMM':
+                f.seek(data_offset)
+                comm = f.read(min(chunk_size, 22))
+                if len(comm) < 18:
+                    return "Broken COMM chunk"
+                channels, frames, bits = struct.unpack('>HIH', comm[:8])
+                compression = comm[18:22] if header[8:12] == b'AIFC' else b'NONE'
+                if compression in AIFC_PCM:
+                    expected = frames * channels * ((bits + 7) // 8)
+            elif chunk_id == b'SSND':
+                f.seek(data_offset)
+                ssnd = f.read(8)
+                if len(ssnd) < 8:
+                    return "Broken SSND chunk"
+                sound_size = chunk_size - 8 - int.from_bytes(ssnd[:4], 'big')  # minus offset/blockSize fields
+        if expected is None and sound_size is None:
+            return "No COMM chunk"
+        if sound_size is None:
+            return "No SSND chunk" if expected else None
+        if expected and sound_size < expected:
+            return f"Truncated: sound data has {max(sound_size, 0)} of {expected} bytes"
+    return None
+
+# --- MP4 / M4A ---
+
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'udta', b'edts', b'dinf', b'mvex', b'moof', b'traf'}
+
+def _walk_mp4(f, start, end, found):
+    """Checks that the atoms between start and end fill it exactly. Returns a reason or None."""
+    covered = start
+    for offset, header_size, atom_size, atom_type in iter_mp4_atoms(f, start, end):
+        name = atom_type.decode('latin-1')
+        if offset + atom_size > end:
+            return f"Truncated: '{name}' atom needs {atom_size} bytes, {end - offset} left"
+        found.setdefault(atom_type, []).append((offset + header_size, offset + atom_size))
+        if atom_type in MP4_CONTAINERS:
+            reason = _walk_mp4(f, offset + header_size, offset + atom_size, found)
+            if reason:
+                return reason
+        covered = offset + atom_size
+    # A few bytes of padding (e.g. QuickTime's 4-byte terminator) are fine, a broken atom header isn't
+    if end - covered >= 8:
+        return f"Broken atom at byte {covered}"
+    return None
+
+def _chunk_offsets(f, data_start, data_end, wide):
+    """Chunk offsets from an stco (32-bit) or co64 (64-bit) atom."""
+    f.seek(data_start)
+    head = f.read(8)
+    if len(head) < 8:
+        return []
+    count = int.from_bytes(head[4:8], 'big')
+    item = 8 if wide else 4
+    count = max(0, min(count, (data_end - data_start - 8) // item))
+    return struct.unpack(f">{count}{'Q' if wide else 'I'}", f.read(count * item))
+
+def validate_mp4(file_path):
+    """Atom tree fills the file, moov and mdat are present and every chunk offset lies inside mdat."""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+        if len(head) < 8 or head[4:8] != b'ftyp':
+            return "No MP4 'ftyp' header"
+        found = {}
+        reason = _walk_mp4(f, 0, size, found)
+        if reason:
+            return reason
+        if b'moov' not in found:
+            return "No 'moov' atom (track index missing)"
+        if b'mdat' not in found and b'moof' not in found:
+            return "No 'mdat' atom (audio data missing)"
+        mdats = found.get(b'mdat', [])
+        for atom_type, wide in ((b'stco', False), (b'co64', True)):
+            for data_start, data_end in found.get(atom_type, []):
+                for chunk_offset in _chunk_offsets(f, data_start, data_end, wide):
+                    if not any(start <= chunk_offset < end for start, end in mdats):
+                        return f"Audio chunk at byte {chunk_offset} lies outside 'mdat' (truncated?)"
+    return None
+
+VALIDATORS = {
+    '.mp3': validate_mp3,
+    '.m4a': validate_mp4,
+    '.wav': validate_wav,
+    '.aiff': validate_aiff,
+}
+
+def validate_file(file_path):
+    """Runs the validator for the file's extension. Module level so it can run in a worker pool."""
+    validator = VALIDATORS[os.path.splitext(file_path)[1].lower()]
+    try:
+        return validator(file_path)
+    except (struct.error, ValueError, IndexError) as e:
+        return f"Unparsable: {e}"
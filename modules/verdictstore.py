@@ -0,0 +1,96 @@
+import os
+import time
+import sqlite3
+
+class VerdictStore:
+    """
+    Health Check verdicts, stored as SQLite database in the library root.
+    Rows are keyed by path and only trusted while size, mtime and the audio MD5 from
+    the file header (FLAC STREAMINFO, empty for other formats) still match, so changed
+    files are checked again.
+    """
+    FILENAME = ".dj_health.sqlite"
+    OK = 'ok'
+    CORRUPT = 'corrupt'
+
+    def __init__(self, root_path):
+        self.db_path = os.path.join(root_path, self.FILENAME)
+        self.conn = None
+        try:
+            self.conn = sqlite3.connect(self.db_path)
+            # tier: the check that gave the verdict ('structure', 'decode' or 'format')
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    audio_md5 TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    reason TEXT,
+                    checked_at REAL NOT NULL
+                )
+            """)
+        except sqlite3.Error:
+            # Read-only volume or broken DB file: every file is checked every time
+            self.conn = None
+
+    def get(self, path, stat, audio_md5):
+        """Returns (status, tier, checked_at) or None if missing/stale. Stale rows are dropped."""
+        if self.conn is None:
+            return None
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, audio_md5, status, tier, checked_at FROM verdicts WHERE path = ?",
+            (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[:3] != (stat.st_size, stat.st_mtime_ns, audio_md5):
+            self.conn.execute("DELETE FROM verdicts WHERE path = ?", (path,))
+            return None
+        return row[3:]
+
+    def put(self, path, stat, audio_md5, status, tier, reason=None):
+        if self.conn is None:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO verdicts (path, size, mtime_ns, audio_md5, status, tier, reason, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, audio_md5, status, tier, reason, time.time())
+        )
+
+    def corrupt(self):
+        """Returns (path, tier, reason, checked_at) of every file whose last verdict is corrupt."""
+        if self.conn is None:
+            return []
+        return self.conn.execute(
+            "SELECT path, tier, reason, checked_at FROM verdicts WHERE status = ? ORDER BY path",
+            (self.CORRUPT,)
+        ).fetchall()
+
+    def forget(self, paths):
+        """Drops the rows of files that were moved out of the library (e.g. quarantined)."""
+        if self.conn is None:
+            return
+        self.conn.executemany("DELETE FROM verdicts WHERE path = ?", ((p,) for p in paths))
+
+    def prune(self, seen_paths, extensions=None):
+        """Drops rows of files that no longer exist in the library (only of these extensions, if given)."""
+        if self.conn is None:
+            return
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM seen")
+        self.conn.executemany("INSERT OR IGNORE INTO seen (path) VALUES (?)", ((p,) for p in seen_paths))
+        stale = [path for (path,) in self.conn.execute("SELECT path FROM verdicts WHERE path NOT IN (SELECT path FROM seen)")
+                 if extensions is None or path.lower().endswith(extensions)]
+        self.conn.executemany("DELETE FROM verdicts WHERE path = ?", ((p,) for p in stale))
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.conn.commit()
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+        self.conn = None
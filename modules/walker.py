@@ -0,0 +1,53 @@
+import os
+from collections import namedtuple
+
+# Folders created by the tool itself; their content is never part of the library.
+IGNORED_FOLDERS = {'_DUPLICATES_TRASH', '_CORRUPT_FILES', '_ALREADY_IN_LIB'}
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.wav', '.aiff', '.m4a')
+
+FileEntry = namedtuple('FileEntry', ['path', 'name', 'stat'])
+
+def scan_files(root_path, extensions=None, progress=None, task=None):
+    """
+    Walks root_path with os.scandir and yields a FileEntry per file, in os.walk order.
+    Dotfiles, dot folders and the tool's own folders (IGNORED_FOLDERS) are skipped.
+    extensions: optional tuple of lowercase extensions to keep (e.g. AUDIO_EXTENSIONS).
+    progress/task: optional rich progress task whose total grows as files are discovered,
+                   so no separate counting pass is needed.
+    """
+    found = 0
+    stack = [root_path]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    # Like os.walk: symlinked folders are not followed
+                    if name not in IGNORED_FOLDERS and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+                if extensions and not name.lower().endswith(extensions):
+                    continue
+                # One stat call per kept file on Linux/macOS (only the entry type comes with the
+                # listing); the result is reused by every caller instead of stat-ing the path again
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            found += 1
+            if progress is not None:
+                progress.update(task, total=found)
+            yield FileEntry(entry.path, name, stat)
+
+        # Depth-first, subfolders in listing order (like os.walk)
+        stack.extend(reversed(subdirs))
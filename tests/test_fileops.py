@@ -0,0 +1,141 @@
+import os
+import pytest
+from modules import fileops
+from modules.fileops import FileOperationExecutor
+
+def write(path, data=b"audio"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "library"
+    root.mkdir()
+    return str(root)
+
+
+def test_move_and_undo_round_trip(library, tmp_path, monkeypatch):
+    first = write(os.path.join(library, "A", "Track.mp3"), b"one")
+    second = write(os.path.join(library, "B", "Track.mp3"), b"two")
+    trash = os.path.join(library, "_DUPLICATES_TRASH")
+    write(os.path.join(trash, "Track.mp3"), b"old")
+
+    monkeypatch.chdir(library)
+    executor = FileOperationExecutor(library)
+    # Relative paths are journaled as absolute ones
+    ops = [executor.plan_move(os.path.relpath(first), trash), executor.plan_move(second, trash)]
+    assert [os.path.basename(op['dst']) for op in ops] == ["Track_1.mp3", "Track_2.mp3"]
+    assert all(error is None for _, error in executor.execute("dedup", ops))
+    assert not os.path.exists(first) and not os.path.exists(second)
+    assert read(os.path.join(trash, "Track_1.mp3")) == b"one"
+
+    # Undo from another working directory finds the journal in the library root
+    monkeypatch.chdir(tmp_path)
+    journals = FileOperationExecutor(library).list_journals()
+    assert len(journals) == 1 and journals[0]['done'] == 2
+    results = FileOperationExecutor(library).undo(journals[0]['path'])
+    assert all(error is None for _, error in results)
+    assert read(first) == b"one" and read(second) == b"two"
+    assert sorted(os.listdir(trash)) == ["Track.mp3"]
+    assert FileOperationExecutor(library).list_journals()[0]['undone'] == 2
+
+
+def test_resume_after_interruption(library, monkeypatch):
+    sources = [write(os.path.join(library, f"{i:02d} - Track.mp3"), bytes([i])) for i in range(4)]
+    trash = os.path.join(library, "_CORRUPT_FILES")
+    os.makedirs(trash)
+    executor = FileOperationExecutor(library)
+    ops = [executor.plan_move(src, trash) for src in sources]
+
+    # Crash after two operations: KeyboardInterrupt is not caught like an OSError
+    apply = FileOperationExecutor._apply
+    calls = []
+    def crashing_apply(op, copy=False):
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        calls.append(op)
+        apply(op, copy)
+    monkeypatch.setattr(FileOperationExecutor, '_apply', staticmethod(crashing_apply))
+    with pytest.raises(KeyboardInterrupt):
+        executor.execute("quarantine", ops)
+    monkeypatch.setattr(FileOperationExecutor, '_apply', staticmethod(apply))
+
+    journal = FileOperationExecutor(library).list_journals()[0]
+    assert (journal['done'], journal['pending']) == (2, 2)
+    # A torn last line (crash while writing) is ignored
+    with open(journal['path'], 'a', encoding='utf-8') as f:
+        f.write('{"done": ')
+
+    results = FileOperationExecutor(library).resume(journal['path'])
+    assert [op['src'] for op, error in results if error is None] == sources[2:]
+    assert sorted(os.listdir(trash)) == sorted(os.path.basename(src) for src in sources)
+    assert FileOperationExecutor(library).list_journals()[0]['pending'] == 0
+
+
+def test_hardlink_replacement_and_undo(library, monkeypatch):
+    keeper = write(os.path.join(library, "A", "Track.flac"), b"identical")
+    duplicate = write(os.path.join(library, "B", "Track.flac"), b"identical")
+    def no_reflink(src, dst):
+        raise OSError("no reflinks here")
+    monkeypatch.setattr(fileops, 'reflink', no_reflink)
+
+    executor = FileOperationExecutor(library)
+    [(op, error)] = executor.execute("dedup", [executor.plan_link(duplicate, keeper)])
+    assert error is None and op['method'] == 'hardlink'
+    assert os.path.samefile(keeper, duplicate)
+    assert not [name for name in os.listdir(os.path.dirname(duplicate)) if name.endswith('.tmp')]
+
+    results = executor.undo(executor.list_journals()[0]['path'])
+    assert all(error is None for _, error in results)
+    assert not os.path.samefile(keeper, duplicate)
+    assert read(duplicate) == b"identical"
+    assert os.stat(keeper).st_nlink == 1
+
+
+def test_collisions_are_planned_case_insensitively(library):
+    trash = os.path.join(library, "_DUPLICATES_TRASH")
+    write(os.path.join(trash, "TRACK.mp3"))
+    executor = FileOperationExecutor(library)
+    op = executor.plan_move(os.path.join(library, "track.mp3"), trash)
+    assert os.path.basename(op['dst']) == "track_1.mp3"
+    assert os.path.basename(executor.plan_move(os.path.join(library, "x", "Track_1.MP3"), trash)['dst']) == "Track_1_1.MP3"
+
+    write(os.path.join(library, "Song.mp3"))
+    assert executor.plan_rename(os.path.join(library, "01 - Song.mp3"), os.path.join(library, "song.mp3")) is None
+    # A change of case only is not a collision with the file itself
+    song = os.path.join(library, "Song.mp3")
+    op = executor.plan_rename(song, os.path.join(library, "SONG.mp3"))
+    assert op is not None
+    assert executor.execute("rename", [op])[0][1] is None
+    assert os.listdir(library).count("SONG.mp3") == 1
+
+
+def test_failed_undo_is_not_resumed(library):
+    src = write(os.path.join(library, "A", "x.mp3"), b"old")
+    target = os.path.join(library, "T")
+    os.makedirs(target)
+    executor = FileOperationExecutor(library)
+    executor.execute("dedup", [executor.plan_move(src, target)])
+    # A new file now takes the original place, so moving back must fail
+    write(src, b"new")
+
+    journal = executor.list_journals()[0]
+    [(_, error)] = executor.undo(journal['path'])
+    assert isinstance(error, FileExistsError)
+    journal = executor.list_journals()[0]
+    assert (journal['done'], journal['pending'], journal['undone']) == (1, 0, 0)
+    # resume() must not move the new file into T
+    assert executor.resume(journal['path']) == []
+    assert read(src) == b"new" and read(os.path.join(target, "x.mp3")) == b"old"
+
+    # The undo can be retried once the place is free again
+    os.remove(src)
+    [(_, error)] = executor.undo(journal['path'])
+    assert error is None and read(src) == b"old"
+    assert executor.list_journals()[0]['undone'] == 1